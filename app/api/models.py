@@ -1,8 +1,18 @@
 import random
 import string
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func, select
+from sqlalchemy.orm import column_property, relationship
 from app.database import Base
 
 
@@ -36,7 +46,7 @@ class APIUsage(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     api_key_id = Column(
         Integer, ForeignKey("api_keys.id", ondelete="CASCADE"), nullable=False
@@ -49,3 +59,53 @@ class APIUsage(Base):
     # Relationships
     user = relationship("User", back_populates="api_usage")
     api_key = relationship("APIKey", back_populates="usage")
+
+
+class APIUsageDaily(Base):
+    """Daily rollup of ``api_usage`` per user, API key and endpoint."""
+
+    __tablename__ = "api_usage_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "api_key_id", "endpoint", "day", name="uq_api_usage_daily"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    api_key_id = Column(
+        Integer, ForeignKey("api_keys.id", ondelete="CASCADE"), nullable=False
+    )
+    endpoint = Column(String(255), nullable=False)
+    day = Column(Date, nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)
+    response_time_sum = Column(Float, nullable=False, default=0)
+
+
+class APIKeyUsageShard(Base):
+    """
+    One of several counter rows per API key. Calls increment a random shard
+    instead of ``api_keys.usage_count`` so hot keys do not serialize on a
+    single row lock.
+    """
+
+    __tablename__ = "api_key_usage_shards"
+
+    api_key_id = Column(
+        Integer, ForeignKey("api_keys.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# Legacy usage_count plus every shard; deferred so that only listings pay for it
+APIKey.total_usage = column_property(
+    func.coalesce(APIKey.usage_count, 0)
+    + select(func.coalesce(func.sum(APIKeyUsageShard.count), 0))
+    .where(APIKeyUsageShard.api_key_id == APIKey.id)
+    .scalar_subquery(),
+    deferred=True,
+)
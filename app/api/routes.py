@@ -1,7 +1,14 @@
-from typing import List
+import csv
+import io
+import json
+from datetime import date, timedelta
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, undefer
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.auth.dependencies import get_current_user
 from . import models, schemas
 
@@ -64,10 +71,146 @@ async def get_api_keys(
 ):
     api_keys = (
         db.query(models.APIKey)
+        .options(undefer(models.APIKey.total_usage))
         .filter(
             models.APIKey.user_id == current_user.id, models.APIKey.is_active == True
         )
         .all()
     )
 
-    return api_keys
+    return [
+        schemas.APIKeyResponse(
+            id=api_key.id,
+            name=api_key.name,
+            key=api_key.key,
+            created_at=api_key.created_at,
+            usage_count=api_key.total_usage,
+        )
+        for api_key in api_keys
+    ]
+
+
+EXPORT_COLUMNS = [
+    "id",
+    "timestamp",
+    "api_key_id",
+    "api_key_name",
+    "endpoint",
+    "is_success",
+    "response_time",
+]
+
+
+def _encode_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(
+            [
+                row.id,
+                row.timestamp.isoformat() if row.timestamp else "",
+                row.api_key_id,
+                row.api_key_name,
+                row.endpoint,
+                row.is_success,
+                row.response_time,
+            ]
+        )
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows, header: bool) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": row.id,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "api_key_id": row.api_key_id,
+                "api_key_name": row.api_key_name,
+                "endpoint": row.endpoint,
+                "is_success": row.is_success,
+                "response_time": row.response_time,
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def _stream_usage(statement, encode):
+    """
+    Yield encoded chunks of usage rows, one keyset-paginated query per
+    chunk (``id > last id``), so memory stays flat however many rows the
+    account has. The MySQL driver buffers whole result sets, so a single
+    streamed query would not do.
+    """
+    # The request-scoped session is released when the response starts,
+    # so the stream owns a session of its own.
+    db = SessionLocal()
+    chunk_size = settings.USAGE_EXPORT_CHUNK_SIZE
+    try:
+        header = True
+        last_id = 0
+        while True:
+            rows = db.execute(
+                statement.where(models.APIUsage.id > last_id).limit(chunk_size)
+            ).all()
+            # Hand the connection back while the client reads the chunk
+            db.rollback()
+            if rows or header:
+                yield encode(rows, header)
+            header = False
+            if len(rows) < chunk_size:
+                break
+            last_id = rows[-1].id
+    finally:
+        db.close()
+
+
+@router.get("/usage/export")
+async def export_usage(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    api_key_id: Optional[int] = None,
+    current_user=Depends(get_current_user),
+):
+    """
+    Stream the user's raw API call history. Only calls inside the raw usage
+    retention window are available.
+    """
+    statement = (
+        select(
+            models.APIUsage.id,
+            models.APIUsage.timestamp,
+            models.APIUsage.api_key_id,
+            models.APIKey.name.label("api_key_name"),
+            models.APIUsage.endpoint,
+            models.APIUsage.is_success,
+            models.APIUsage.response_time,
+        )
+        .join(models.APIKey, models.APIKey.id == models.APIUsage.api_key_id)
+        .where(models.APIUsage.user_id == current_user.id)
+        .order_by(models.APIUsage.id)
+    )
+    if start is not None:
+        statement = statement.where(models.APIUsage.timestamp >= start)
+    if end is not None:
+        statement = statement.where(models.APIUsage.timestamp < end + timedelta(days=1))
+    if api_key_id is not None:
+        statement = statement.where(models.APIUsage.api_key_id == api_key_id)
+
+    if format == "ndjson":
+        encode, media_type = _encode_ndjson, "application/x-ndjson"
+    else:
+        encode, media_type = _encode_csv, "text/csv"
+
+    return StreamingResponse(
+        _stream_usage(statement, encode),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="usage.{format}"',
+        },
+    )
@@ -1,17 +1,24 @@
-from fastapi import HTTPException, Depends, Header
+from fastapi import HTTPException, Depends, Header, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Tuple
-from app.core.utils import check_user_limit
-from app.database import get_db
+from app.config import settings
+from app.core.utils import check_user_limit, check_user_limit_async
+from app.database import get_db, get_request_async_db
 from app.api.models import APIKey
-from app.auth.dependencies import verify_api_key
+from app.auth.dependencies import verify_api_key, verify_api_key_async
 from app.auth.models import User, UserStatus
 
 
 async def verify_api_key_header(
-    x_api_key: str = Header(...), db: Session = Depends(get_db)
+    request: Request, x_api_key: str = Header(...), db: Session = Depends(get_db)
 ) -> tuple[APIKey, Session]:
     """Verify API key and return the associated user and API key record."""
+    if settings.DB_ASYNC:
+        return await _verify_api_key_header_async(
+            x_api_key, get_request_async_db(request)
+        )
+
     user = verify_api_key(x_api_key, db)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid API key")
@@ -33,14 +40,35 @@ async def verify_api_key_header(
     return api_key, db
 
 
+async def _verify_api_key_header_async(x_api_key: str, db):
+    user = await verify_api_key_async(x_api_key, db)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    api_key = await db.scalar(
+        select(APIKey).where(APIKey.key == x_api_key, APIKey.is_active == True)
+    )
+
+    if not await check_user_limit_async(user.id, db):
+        raise HTTPException(
+            status_code=429,
+            detail="Monthly API limit reached. Please upgrade to Donatur status for unlimited access.",
+        )
+
+    return api_key, db
+
+
 async def verify_donatur_access(
-    x_api_key: str = Header(...), db: Session = Depends(get_db)
+    request: Request, x_api_key: str = Header(...), db: Session = Depends(get_db)
 ) -> Tuple[APIKey, Session]:
     """Verify API key and ensure user has DONATUR status."""
-    api_key, db = await verify_api_key_header(x_api_key, db)
+    api_key, db = await verify_api_key_header(request, x_api_key, db)
 
     # Check if user has DONATUR status
-    user = db.query(User).filter(User.id == api_key.user_id).first()
+    if settings.DB_ASYNC:
+        user = await db.get(User, api_key.user_id)
+    else:
+        user = db.query(User).filter(User.id == api_key.user_id).first()
     if not user or user.status != UserStatus.DONATUR:
         raise HTTPException(
             status_code=403,
@@ -1,48 +1,112 @@
 from fastapi import Depends, HTTPException, status, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_request_async_db
 from . import utils, models
+from .token_cache import cache_user, get_cached_user, get_cached_user_id
 from jose import JWTError
 from app.config import settings
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-async def get_current_user(
-    request: Request, db: Session = Depends(get_db)
-) -> models.User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Marks a request whose user has not been looked up yet
+_UNRESOLVED = object()
 
-    token = request.cookies.get("access_token")
-    if not token:
-        raise credentials_exception
 
+def _token_username(token: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """The ``sub`` of a valid access token and its claims, or None."""
     try:
         payload = utils.jwt.decode(
-            str(token), settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        return None, {}
+    return payload.get("sub"), payload
+
+
+def resolve_request_user(request: Request, db: Session) -> Optional[models.User]:
+    """
+    Resolve the user behind the ``access_token`` cookie on first access and
+    memoize it on ``request.state`` for the rest of the request.
+    """
+    user = getattr(request.state, "current_user", _UNRESOLVED)
+    if user is not _UNRESOLVED:
+        return user
+
+    user = None
+    token = request.cookies.get("access_token")
+    if token:
+        user = get_cached_user(str(token), db)
 
-    user = db.query(models.User).filter(models.User.username == username).first()
+    if token and user is None:
+        username, payload = _token_username(str(token))
+        if username is not None:
+            user = (
+                db.query(models.User).filter(models.User.username == username).first()
+            )
+            if user is not None:
+                cache_user(str(token), payload, user)
+
+    request.state.current_user = user
+    return user
+
+
+async def resolve_request_user_async(
+    request: Request, db: "AsyncSession"
+) -> Optional[models.User]:
+    """
+    Async counterpart of resolve_request_user, used when DB_ASYNC is
+    enabled. A cached token still saves the JWT check and the username
+    lookup; the user is then loaded by primary key.
+    """
+    user = getattr(request.state, "current_user", _UNRESOLVED)
+    if user is not _UNRESOLVED:
+        return user
+
+    user = None
+    token = request.cookies.get("access_token")
+    if token:
+        user_id = get_cached_user_id(str(token))
+        if user_id is not None:
+            user = await db.get(models.User, user_id)
+        else:
+            username, payload = _token_username(str(token))
+            if username is not None:
+                user = await db.scalar(
+                    select(models.User).where(models.User.username == username)
+                )
+                if user is not None:
+                    cache_user(str(token), payload, user)
+
+    request.state.current_user = user
+    return user
+
+
+async def _current_user(request: Request, db: Session) -> Optional[models.User]:
+    if settings.DB_ASYNC:
+        return await resolve_request_user_async(request, get_request_async_db(request))
+    return resolve_request_user(request, db)
+
+
+async def get_current_user(
+    request: Request, db: Session = Depends(get_db)
+) -> models.User:
+    user = await _current_user(request, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
 async def get_current_user_optional(
     request: Request, db: Session = Depends(get_db)
 ) -> Optional[models.User]:
-    try:
-        return await get_current_user(request, db)
-    except HTTPException:
-        return None
+    return await _current_user(request, db)
 
 
 def verify_api_key(api_key: str, db: Session) -> Optional[models.User]:
@@ -54,3 +118,16 @@ def verify_api_key(api_key: str, db: Session) -> Optional[models.User]:
     if not db_key:
         return None
     return db.query(models.User).filter(models.User.id == db_key.user_id).first()
+
+
+async def verify_api_key_async(
+    api_key: str, db: "AsyncSession"
+) -> Optional[models.User]:
+    from app.api.models import APIKey
+
+    user_id = await db.scalar(
+        select(APIKey.user_id).where(APIKey.key == api_key, APIKey.is_active == True)
+    )
+    if user_id is None:
+        return None
+    return await db.get(models.User, user_id)
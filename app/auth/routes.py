@@ -7,10 +7,13 @@ from app.database import get_db
 from app.config import settings
 from . import models, schemas, utils
 from .dependencies import get_current_user_optional, get_current_user
-from app.core.utils import send_email
+from .token_cache import invalidate_user_cache
+from app.core.mailer import enqueue_email
+from app.web.assets import asset_url
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
 utc_now = datetime.now(timezone.utc)
 
 
@@ -33,7 +36,9 @@ async def login(
     db: Session = Depends(get_db),
 ):
     user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not utils.verify_password(password, user.hashed_password):
+    if not user or not await utils.verify_password_async(
+        password, user.hashed_password
+    ):
         return templates.TemplateResponse(
             "pages/login.html",
             {
@@ -90,7 +95,7 @@ async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db))
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Create new user
-        hashed_password = utils.get_password_hash(user_data.password)
+        hashed_password = await utils.get_password_hash_async(user_data.password)
         user = models.User(
             username=user_data.username,
             email=user_data.email,
@@ -168,10 +173,11 @@ async def forgot_password(request: Request, db: Session = Depends(get_db)):
     # Send email
     try:
         email_body = utils.create_password_reset_email(reset_url)
-        send_email(
+        enqueue_email(
             to_email=user.email,
             subject="Reset Your Password - YourEmailValidator",
             body=email_body,
+            sensitive=True,
         )
     except Exception:
         db.rollback()
@@ -257,11 +263,12 @@ async def reset_password(request: Request, db: Session = Depends(get_db)):
 
     # Update password
     user = reset_request.user
-    user.hashed_password = utils.get_password_hash(new_password)
+    user.hashed_password = await utils.get_password_hash_async(new_password)
 
     # Mark token as used
     reset_request.is_used = True
     db.commit()
+    invalidate_user_cache(user.id)
 
     return RedirectResponse(
         url="/login?reset=success", status_code=status.HTTP_302_FOUND
@@ -290,7 +297,10 @@ async def change_password(
     new_password = form_data.get("new_password")
     confirm_password = form_data.get("confirm_password")
 
-    if not utils.verify_password(current_password, current_user.hashed_password):
+    # The row as it is now, not as this worker last saw it, and on this
+    # session (with DB_ASYNC the request's user belongs to the async one)
+    user = db.get(models.User, current_user.id, populate_existing=True)
+    if not await utils.verify_password_async(current_password, user.hashed_password):
         return templates.TemplateResponse(
             "pages/change_password.html",
             {
@@ -311,8 +321,9 @@ async def change_password(
         )
 
     # Update password
-    current_user.hashed_password = utils.get_password_hash(new_password)
+    user.hashed_password = await utils.get_password_hash_async(new_password)
     db.commit()
+    invalidate_user_cache(user.id)
 
     # Send confirmation email
     try:
@@ -325,7 +336,7 @@ If you did not make this change, please contact support immediately.
 Best regards,
 YourEmailValidator Team
         """
-        send_email(
+        enqueue_email(
             to_email=current_user.email,
             subject="Password Changed - YourEmailValidator",
             body=email_body,
@@ -0,0 +1,83 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.config import settings
+from app.core.metrics import register_metrics
+from . import models
+
+# Columns safe to serve from a snapshot. Credentials and status are left out:
+# the cache is per worker, so a change made on another worker would not be
+# seen here. Left unloaded, they are read from the row when first used.
+SNAPSHOT_COLUMNS = ("id", "email", "username", "created_at")
+
+# token digest -> (expires_at, user_id, user column snapshot)
+_cache: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _lookup(token: str) -> Optional[Tuple[float, int, Dict[str, Any]]]:
+    digest = token_digest(token)
+    entry = _cache.get(digest)
+    if entry is None or entry[0] <= time.time():
+        _cache.pop(digest, None)
+        _stats["misses"] += 1
+        return None
+
+    _cache.move_to_end(digest)
+    _stats["hits"] += 1
+    return entry
+
+
+def get_cached_user_id(token: str) -> Optional[int]:
+    """The user id of an already verified token, or None on a cache miss."""
+    entry = _lookup(token)
+    return None if entry is None else entry[1]
+
+
+def get_cached_user(token: str, db: Session) -> Optional[models.User]:
+    """
+    Return the user for an already verified token, attached to ``db``
+    without issuing a query, or None on a cache miss. Columns outside
+    ``SNAPSHOT_COLUMNS`` are loaded from the database on first access.
+    """
+    entry = _lookup(token)
+    if entry is None:
+        return None
+
+    user = models.User(**entry[2])
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def cache_user(token: str, claims: Dict[str, Any], user: models.User) -> None:
+    """Remember a verified token until its ``exp`` or the cache TTL, whichever is first."""
+    expires_at = time.time() + settings.TOKEN_CACHE_TTL
+    if claims.get("exp") is not None:
+        expires_at = min(expires_at, float(claims["exp"]))
+
+    snapshot = {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+    digest = token_digest(token)
+    _cache[digest] = (expires_at, user.id, snapshot)
+    _cache.move_to_end(digest)
+    while len(_cache) > settings.TOKEN_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop every cached token of a user whose account just changed."""
+    for digest in [d for d, entry in _cache.items() if entry[1] == user_id]:
+        del _cache[digest]
+        _stats["invalidations"] += 1
+
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    return {"size": len(_cache), "max_size": settings.TOKEN_CACHE_SIZE, **_stats}
+
+
+register_metrics("token_cache", get_token_cache_stats)
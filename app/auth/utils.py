@@ -1,12 +1,24 @@
-from random import random
+import asyncio
 import string
 import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.core.metrics import register_metrics
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+hash_stats = {"in_flight": 0, "completed": 0, "rejected": 0, "total_ms": 0.0}
 
 
 def verify_password(plain_password, hashed_password):
@@ -17,12 +29,61 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def _run_hashing(func, *args):
+    """Run bcrypt work on the bounded executor, shedding load when saturated."""
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+    if hash_stats["in_flight"] >= capacity:
+        hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    hash_stats["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            hash_executor, func, *args
+        )
+    finally:
+        hash_stats["in_flight"] -= 1
+        hash_stats["completed"] += 1
+        hash_stats["total_ms"] += (time.perf_counter() - start) * 1000
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
+def get_hashing_stats() -> dict:
+    in_flight = hash_stats["in_flight"]
+    completed = hash_stats["completed"]
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "in_flight": in_flight,
+        "queue_depth": max(0, in_flight - settings.PASSWORD_HASH_WORKERS),
+        "completed": completed,
+        "rejected": hash_stats["rejected"],
+        "avg_ms": hash_stats["total_ms"] / completed if completed else 0,
+    }
+
+
+register_metrics("password_hashing", get_hashing_stats)
+
+
 def generate_random_password(length: int = 12) -> str:
     """
     Generate a random password with a mix of letters, digits, and symbols.
     """
     characters = string.ascii_letters + string.digits + "!@#$%^&*()"
-    return "".join(random.choice(characters) for _ in range(length))
+    return "".join(secrets.choice(characters) for _ in range(length))
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
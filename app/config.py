@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,25 +8,97 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 300
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
     WEBHOOK_TOKEN: str
+    WEBHOOK_POLL_INTERVAL: int = 5
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_CLAIM_TIMEOUT: int = 300
+    # Public URL of the site, for links in emails sent outside a request
+    SITE_URL: str = "https://youremailvalidator.com"
     MYSQL_USER: str
     MYSQL_PASSWORD: str
     MYSQL_HOST: str
     MYSQL_PORT: int
     MYSQL_DB: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    # Overrides the MySQL URL, e.g. "sqlite:///./local.db" for local runs
+    DB_URL: Optional[str] = None
+    DB_ASYNC: bool = False
+    # Startup warm-up: pooled connections to open, popular domains to prefetch MX for
+    WARMUP_DB_CONNECTIONS: int = 2
+    WARMUP_MX_DOMAINS: int = 0
+    # Seconds between rebuilds of the typo-suggestion domain index; 0 disables
+    SUGGESTION_INDEX_REFRESH_INTERVAL: int = 3600
+    # Validation results cache: entries kept, and seconds an entry may live at most
+    RESULT_CACHE_SIZE: int = 10000
+    RESULT_CACHE_TTL: int = 3600
+    # Share MX answers between workers and hosts through Redis, e.g. "redis://cache:6379/0"
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_REDIS_PREFIX: str = "emailvalidator:"
+    CACHE_REDIS_TIMEOUT: float = 0.1
+    CACHE_REDIS_RETRY_INTERVAL: float = 5.0
+    # Seconds past their TTL that MX answers are served while being refreshed,
+    # and at most when the DNS lookup is unavailable
+    MX_STALE_WHILE_REVALIDATE: int = 60
+    MX_MAX_STALE: int = 3600
+    USAGE_RETENTION_ENABLED: bool = True
+    USAGE_RETENTION_DAYS: int = 90
+    USAGE_RETENTION_BATCH_SIZE: int = 1000
+    USAGE_RETENTION_BATCH_PAUSE: float = 0.1
+    USAGE_RETENTION_INTERVAL: int = 3600
+    USAGE_EXPORT_CHUNK_SIZE: int = 1000
+    USAGE_COUNTER_SHARDS: int = 16
+    USAGE_STREAM_POLL_INTERVAL: int = 15
+    # Calls made over /api/v1/ws/validate are logged in batches of this many,
+    # or after this many seconds
+    WS_USAGE_BATCH_SIZE: int = 50
+    WS_USAGE_FLUSH_INTERVAL: float = 10
     SMTP_SERVER: str
     SMTP_PORT: int
     LOGIN_EMAIL: str
     SENDER_EMAIL: str
     LOGIN_PASSWORD: str
+    SMTP_STARTTLS: bool = True
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_ATTEMPTS: int = 5
+    MAIL_RETRY_BACKOFF: float = 2.0
+    MAIL_RETRY_BACKOFF_MAX: float = 300
+    MAIL_IDLE_TIMEOUT: float = 60
+    MAIL_SHUTDOWN_TIMEOUT: float = 10
+    METRICS_TOKEN: Optional[str] = None
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
 
     @property
     def DATABASE_URL(self) -> str:
         from urllib.parse import quote_plus
 
+        if self.DB_URL:
+            return self.DB_URL
+
         password = quote_plus(self.MYSQL_PASSWORD)
         return f"mysql+mysqlconnector://{self.MYSQL_USER}:{password}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        url = self.DATABASE_URL
+        for sync_driver, async_driver in (
+            ("mysql+mysqlconnector://", "mysql+aiomysql://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(sync_driver):
+                return async_driver + url[len(sync_driver) :]
+        return url
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,159 @@
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+# Content that is already compressed or must reach the client unbuffered
+SKIPPED_CONTENT_TYPES = ("image/", "video/", "audio/", "text/event-stream")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """The content codings of an Accept-Encoding header and their q-values."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick zstd or gzip from an Accept-Encoding header, honouring q=0."""
+    accepted = accepted_encodings(accept_encoding)
+    if zstandard is not None and accepted.get("zstd", 0) > 0:
+        return "zstd"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        chunk = self._compressor.compress(data)
+        if final:
+            return chunk + self._compressor.flush()
+        # Flush every chunk so incremental responses reach the client promptly
+        return chunk + self._compressor.flush(self._flush_mode)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with zstd or gzip, negotiated from Accept-Encoding,
+    once they reach ``minimum_size`` bytes. Streaming responses are buffered
+    only until the threshold is crossed and are then compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.buffer = b""
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or headers.get(
+                "content-type", ""
+            ).startswith(SKIPPED_CONTENT_TYPES)
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self.downstream(
+                {
+                    "type": "http.response.body",
+                    "body": self.compressor.compress(body, final=not more_body),
+                    "more_body": more_body,
+                }
+            )
+            return
+
+        self.buffer += body
+        if len(self.buffer) < self.middleware.minimum_size:
+            if more_body:
+                return
+            # Finished below the threshold: send it as it is
+            await self.downstream(self.start_message)
+            await self.downstream(
+                {"type": "http.response.body", "body": self.buffer, "more_body": False}
+            )
+            return
+
+        self.compressor = _Compressor(
+            self.encoding, self.middleware.gzip_level, self.middleware.zstd_level
+        )
+        compressed = self.compressor.compress(self.buffer, final=not more_body)
+        self.buffer = b""
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            # The encoded bytes differ from the identity representation
+            headers["ETag"] = "W/" + etag
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+        await self.downstream(self.start_message)
+        await self.downstream(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
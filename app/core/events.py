@@ -0,0 +1,50 @@
+"""
+In-process notifications that a user's API usage changed.
+
+The usage middleware calls ``usage_notifier.notify`` after committing a call,
+which wakes the user's open dashboard streams. Notifications only reach
+streams served by the same worker; streams also re-check the usage version
+periodically, so calls handled by other workers show up within
+``USAGE_STREAM_POLL_INTERVAL`` seconds.
+"""
+
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+from app.core.metrics import register_metrics
+
+
+class UsageNotifier:
+    def __init__(self):
+        self._listeners: Dict[int, Set[asyncio.Event]] = defaultdict(set)
+
+    @contextmanager
+    def listen(self, user_id: int) -> Iterator[asyncio.Event]:
+        """Yield an event that is set whenever ``user_id`` logs a call."""
+        event = asyncio.Event()
+        self._listeners[user_id].add(event)
+        try:
+            yield event
+        finally:
+            listeners = self._listeners.get(user_id)
+            if listeners is not None:
+                listeners.discard(event)
+                if not listeners:
+                    del self._listeners[user_id]
+
+    def notify(self, user_id: int) -> None:
+        for event in self._listeners.get(user_id, ()):
+            event.set()
+
+    def stats(self):
+        return {
+            "users": len(self._listeners),
+            "listeners": sum(len(events) for events in self._listeners.values()),
+        }
+
+
+usage_notifier = UsageNotifier()
+
+register_metrics("usage_streams", usage_notifier.stats)
@@ -0,0 +1,328 @@
+"""
+Outbound mail queue.
+
+Request handlers call ``enqueue_email`` and return immediately. A single
+background worker drains the queue in batches of up to ``MAIL_BATCH_SIZE``
+over one authenticated SMTP connection, which it keeps open between batches
+and closes after ``MAIL_IDLE_TIMEOUT`` idle seconds.
+
+Transient failures are retried with jittered exponential backoff. Messages
+the server rejects permanently (5xx), or that run out of attempts, are
+written to the ``failed_emails`` dead-letter table. Bodies of messages
+marked ``sensitive`` (credentials, reset links) are not stored there.
+"""
+
+import asyncio
+import random
+import smtplib
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Optional, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.core.metrics import register_metrics
+from app.core.models import FailedEmail
+from app.database import SessionLocal
+
+
+class MailQueueFullError(Exception):
+    """Raised when the outbound mail queue is at capacity."""
+
+
+@dataclass
+class OutgoingEmail:
+    to_email: str
+    subject: str
+    body: str
+    sensitive: bool = False
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+class SMTPConnection:
+    """A reusable SMTP connection. Only used from one thread at a time."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        starttls: bool = True,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.opened = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.opened += 1
+        return smtp
+
+    def sendmail(self, sender: str, recipient: str, message: str) -> None:
+        """Send on the open connection, reconnecting once if it was dropped."""
+        if self._smtp is None:
+            self._smtp = self._open()
+        try:
+            self._smtp.sendmail(sender, recipient, message)
+        except smtplib.SMTPServerDisconnected:
+            self._smtp = self._open()
+            self._smtp.sendmail(sender, recipient, message)
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Whether retrying cannot help: the server rejected the message itself."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        # A credentials problem; the message may go through once it is fixed
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def _build_message(sender: str, email: OutgoingEmail) -> str:
+    message = MIMEMultipart()
+    message["From"] = sender
+    message["To"] = email.to_email
+    message["Subject"] = email.subject
+    message.attach(MIMEText(email.body, "plain"))
+    return message.as_string()
+
+
+class Mailer:
+    def __init__(
+        self,
+        connection: SMTPConnection,
+        sender: str,
+        queue_size: int = 1000,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        retry_backoff: float = 2.0,
+        retry_backoff_max: float = 300,
+        idle_timeout: float = 60,
+    ):
+        self.connection = connection
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.idle_timeout = idle_timeout
+        self.queue: "asyncio.Queue[OutgoingEmail]" = asyncio.Queue(maxsize=queue_size)
+        self.stats: Dict[str, Any] = {
+            "queued": 0,
+            "sent": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "batches": 0,
+            "last_error": None,
+        }
+        self._retrying: Dict[int, Tuple[asyncio.TimerHandle, OutgoingEmail]] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, email: OutgoingEmail) -> None:
+        try:
+            self.queue.put_nowait(email)
+        except asyncio.QueueFull:
+            raise MailQueueFullError("Outbound mail queue is full")
+        self.stats["queued"] += 1
+
+    def _send_batch(
+        self, batch: List[OutgoingEmail]
+    ) -> List[Tuple[OutgoingEmail, bool]]:
+        """Send ``batch`` in order; return failed messages and whether that is final."""
+        failed = []
+        for email in batch:
+            try:
+                self.connection.sendmail(
+                    self.sender, email.to_email, _build_message(self.sender, email)
+                )
+                self.stats["sent"] += 1
+            except Exception as e:
+                email.attempts += 1
+                email.last_error = str(e)
+                self.stats["last_error"] = email.last_error
+                if not isinstance(
+                    e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+                ):
+                    # Connection-level failure; start over with a new connection
+                    self.connection.close()
+                failed.append((email, _is_permanent(e)))
+        return failed
+
+    def _dead_letter(self, emails: List[OutgoingEmail]) -> None:
+        db = SessionLocal()
+        try:
+            db.add_all(
+                FailedEmail(
+                    to_email=email.to_email,
+                    subject=email.subject,
+                    body=None if email.sensitive else email.body,
+                    error=email.last_error,
+                    attempts=email.attempts,
+                )
+                for email in emails
+            )
+            db.commit()
+            self.stats["dead_lettered"] += len(emails)
+        except Exception as e:
+            db.rollback()
+            self.stats["last_error"] = f"Failed to store dead letters: {e}"
+        finally:
+            db.close()
+
+    def _retry_later(self, email: OutgoingEmail) -> None:
+        delay = min(
+            self.retry_backoff_max, self.retry_backoff * 2 ** (email.attempts - 1)
+        )
+        delay *= random.uniform(0.5, 1.5)
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, email)
+        self._retrying[id(email)] = (handle, email)
+        self.stats["retried"] += 1
+
+    def _requeue(self, email: OutgoingEmail) -> None:
+        self._retrying.pop(id(email), None)
+        try:
+            self.queue.put_nowait(email)
+        except asyncio.QueueFull:
+            email.last_error = "Outbound mail queue is full"
+            task = asyncio.create_task(run_in_threadpool(self._dead_letter, [email]))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _next_batch(self) -> List[OutgoingEmail]:
+        batch = [await self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch = await asyncio.wait_for(self._next_batch(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await run_in_threadpool(self.connection.close)
+                continue
+
+            try:
+                self.stats["batches"] += 1
+                failed = await run_in_threadpool(self._send_batch, batch)
+                give_up = []
+                for email, permanent in failed:
+                    if permanent or email.attempts >= self.max_attempts:
+                        give_up.append(email)
+                    else:
+                        self._retry_later(email)
+                if give_up:
+                    await run_in_threadpool(self._dead_letter, give_up)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float) -> None:
+        """Flush the queue for up to ``timeout`` seconds, then dead-letter the rest."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        leftovers = []
+        for handle, email in self._retrying.values():
+            handle.cancel()
+            leftovers.append(email)
+        self._retrying.clear()
+        while not self.queue.empty():
+            leftovers.append(self.queue.get_nowait())
+            self.queue.task_done()
+        for email in leftovers:
+            email.last_error = email.last_error or "Not sent before shutdown"
+        if leftovers:
+            await run_in_threadpool(self._dead_letter, leftovers)
+        await run_in_threadpool(self.connection.close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_size": self.queue.qsize(),
+            "retrying": len(self._retrying),
+            "connections_opened": self.connection.opened,
+        }
+
+
+mailer = Mailer(
+    SMTPConnection(
+        settings.SMTP_SERVER,
+        settings.SMTP_PORT,
+        settings.LOGIN_EMAIL,
+        settings.LOGIN_PASSWORD,
+        starttls=settings.SMTP_STARTTLS,
+    ),
+    sender=settings.SENDER_EMAIL,
+    queue_size=settings.MAIL_QUEUE_SIZE,
+    batch_size=settings.MAIL_BATCH_SIZE,
+    max_attempts=settings.MAIL_MAX_ATTEMPTS,
+    retry_backoff=settings.MAIL_RETRY_BACKOFF,
+    retry_backoff_max=settings.MAIL_RETRY_BACKOFF_MAX,
+    idle_timeout=settings.MAIL_IDLE_TIMEOUT,
+)
+
+
+def enqueue_email(to_email: str, subject: str, body: str, sensitive: bool = False):
+    """
+    Queue an email for background delivery.
+    Raises MailQueueFullError when the queue is at capacity.
+    """
+    mailer.enqueue(OutgoingEmail(to_email, subject, body, sensitive=sensitive))
+
+
+def start_mailer() -> None:
+    mailer.start()
+
+
+async def stop_mailer() -> None:
+    await mailer.stop(settings.MAIL_SHUTDOWN_TIMEOUT)
+
+
+register_metrics("mailer", mailer.get_stats)
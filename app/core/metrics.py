@@ -0,0 +1,20 @@
+from typing import Any, Callable, Dict
+
+# Named providers whose snapshots are served from /metrics
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register a callable returning a snapshot of a subsystem's metrics."""
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Collect a snapshot from every registered provider."""
+    metrics = {}
+    for name, provider in _providers.items():
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            metrics[name] = {"error": str(e)}
+    return metrics
@@ -1,13 +1,27 @@
 from fastapi import Request, HTTPException, status
 from datetime import datetime
-from app.core.utils import check_user_limit
-from app.database import get_db
-from app.auth.dependencies import get_current_user_optional, verify_api_key
-from app.api.models import APIKey, APIUsage
+from sqlalchemy import select
+from app.config import settings
+from app.core.events import usage_notifier
+from app.core.utils import (
+    check_user_limit,
+    check_user_limit_async,
+    log_api_usage,
+    log_api_usage_async,
+)
+from app.database import (
+    close_request_async_db,
+    close_request_db,
+    get_request_async_db,
+    get_request_db,
+)
+from app.auth.dependencies import verify_api_key, verify_api_key_async
+from app.api.models import APIKey
 
 # Add list of endpoints that don't require API key verification
 EXEMPT_ENDPOINTS = [
     "/api/keys",
+    "/api/usage",
     "/api/auth",
     "/api/docs",
     "/api/openapi.json",
@@ -28,7 +42,12 @@ async def log_api_requests(request: Request, call_next):
                     status_code=status.HTTP_401_UNAUTHORIZED, detail="API key required"
                 )
 
-            db = next(get_db())
+            if settings.DB_ASYNC:
+                return await _log_api_request_async(
+                    request, call_next, api_key, start_time
+                )
+
+            db = get_request_db(request)
             user = verify_api_key(api_key, db)
 
             if not user:
@@ -54,7 +73,8 @@ async def log_api_requests(request: Request, call_next):
             end_time = datetime.now()
             response_time = (end_time - start_time).total_seconds() * 1000
 
-            usage_log = APIUsage(
+            log_api_usage(
+                db,
                 user_id=user.id,
                 api_key_id=key_record.id,
                 endpoint=request.url.path,
@@ -62,20 +82,59 @@ async def log_api_requests(request: Request, call_next):
                 response_time=response_time,
             )
 
-            key_record.usage_count += 1
-            db.add(usage_log)
             db.commit()
+            usage_notifier.notify(user.id)
 
             return response
 
     return await call_next(request)
 
 
-async def authenticate_user_middleware(request: Request, call_next):
-    try:
-        db = next(get_db())
-        request.state.user = await get_current_user_optional(request, db)
-    except Exception:
-        request.state.user = None
+async def _log_api_request_async(request: Request, call_next, api_key, start_time):
+    """Same flow as log_api_requests, on the AsyncSession."""
+    db = get_request_async_db(request)
+    user = await verify_api_key_async(api_key, db)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
+        )
+
+    if not await check_user_limit_async(user.id, db):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Monthly API limit reached. Please upgrade to Donatur status for unlimited access.",
+        )
+
     response = await call_next(request)
+
+    key_record = await db.scalar(
+        select(APIKey).where(APIKey.key == api_key, APIKey.is_active == True)
+    )
+
+    end_time = datetime.now()
+    response_time = (end_time - start_time).total_seconds() * 1000
+
+    await log_api_usage_async(
+        db,
+        user_id=user.id,
+        api_key_id=key_record.id,
+        endpoint=request.url.path,
+        is_success=response.status_code < 400,
+        response_time=response_time,
+    )
+
+    await db.commit()
+    usage_notifier.notify(user.id)
+
     return response
+
+
+async def db_session_middleware(request: Request, call_next):
+    """Share one lazily created session per request and always release it."""
+    request.state.db_managed = True
+    try:
+        return await call_next(request)
+    finally:
+        close_request_db(request)
+        await close_request_async_db(request)
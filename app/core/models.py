@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class FailedEmail(Base):
+    """Dead-letter store for outbound mail that could not be delivered."""
+
+    __tablename__ = "failed_emails"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    to_email = Column(String(255), nullable=False, index=True)
+    subject = Column(String(255), nullable=False)
+    # Not stored for messages carrying credentials or reset links
+    body = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,135 @@
+"""
+Retention for the raw ``api_usage`` table.
+
+Every call is folded into ``api_usage_daily`` in the same transaction that
+records it, so raw rows past the retention window carry no information the
+rollups do not already hold. They are deleted in small primary-key batches
+with a pause in between so that concurrent inserts are never blocked for
+long.
+
+Every worker runs the job, but a run only purges while holding a named
+lock; workers that find it taken skip that run.
+
+The table is not range-partitioned by month: InnoDB does not support
+partitioning tables that take part in foreign keys, which ``api_usage``
+does, so batched deletes are used on every backend.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.api.models import APIUsage
+from app.config import settings
+from app.core.metrics import register_metrics
+from app.core.utils import named_lock
+from app.database import SessionLocal
+
+retention_stats: Dict[str, Any] = {
+    "running": False,
+    "runs": 0,
+    "batches": 0,
+    "rows_deleted": 0,
+    "last_cutoff": None,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_rows_deleted": 0,
+    "last_error": None,
+}
+
+_task: Optional[asyncio.Task] = None
+
+
+def purge_usage_batch(db, cutoff: datetime, batch_size: int) -> int:
+    """Delete one batch of raw usage rows older than ``cutoff``."""
+    ids = [
+        row.id
+        for row in db.query(APIUsage.id)
+        .filter(APIUsage.timestamp < cutoff)
+        .order_by(APIUsage.id)
+        .limit(batch_size)
+    ]
+    if not ids:
+        return 0
+
+    db.query(APIUsage).filter(APIUsage.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+def compact_usage(retention_days: int = None, batch_size: int = None) -> int:
+    """
+    Purge raw usage past the retention window. Returns the rows deleted,
+    or 0 if another worker is purging.
+    """
+    retention_days = retention_days or settings.USAGE_RETENTION_DAYS
+    batch_size = batch_size or settings.USAGE_RETENTION_BATCH_SIZE
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    db = SessionLocal()
+    try:
+        with named_lock(db, "api_usage_retention", timeout=0) as acquired:
+            if not acquired:
+                return 0
+            return _purge_usage(db, cutoff, batch_size)
+    finally:
+        db.close()
+
+
+def _purge_usage(db, cutoff: datetime, batch_size: int) -> int:
+    retention_stats.update(
+        running=True,
+        last_cutoff=cutoff.isoformat(),
+        last_started_at=datetime.now().isoformat(),
+        last_rows_deleted=0,
+        last_error=None,
+    )
+    try:
+        while True:
+            deleted = purge_usage_batch(db, cutoff, batch_size)
+            if not deleted:
+                break
+            retention_stats["batches"] += 1
+            retention_stats["rows_deleted"] += deleted
+            retention_stats["last_rows_deleted"] += deleted
+            time.sleep(settings.USAGE_RETENTION_BATCH_PAUSE)
+    except Exception as e:
+        db.rollback()
+        retention_stats["last_error"] = str(e)
+        raise
+    finally:
+        retention_stats["runs"] += 1
+        retention_stats["running"] = False
+        retention_stats["last_finished_at"] = datetime.now().isoformat()
+
+    return retention_stats["last_rows_deleted"]
+
+
+async def _retention_loop() -> None:
+    while True:
+        try:
+            await run_in_threadpool(compact_usage)
+        except Exception as e:
+            print(f"Usage retention run failed: {e}")
+        await asyncio.sleep(settings.USAGE_RETENTION_INTERVAL)
+
+
+def start_retention_job() -> None:
+    global _task
+    if settings.USAGE_RETENTION_ENABLED and _task is None:
+        _task = asyncio.create_task(_retention_loop())
+
+
+async def stop_retention_job() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+register_metrics("usage_retention", lambda: dict(retention_stats))
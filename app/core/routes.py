@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.database import get_pool_stats
+from .metrics import collect_metrics, register_metrics
+from .warmup import warmup_state
+
+router = APIRouter()
+
+register_metrics("db_pool", get_pool_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Operational metrics for the running worker."""
+    if settings.METRICS_TOKEN and (
+        request.headers.get("X-Metrics-Token") != settings.METRICS_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token"
+        )
+    return collect_metrics()
+
+
+@router.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness probe: 503 until the startup warm-up has finished."""
+    body = {"ready": warmup_state["ready"], "steps": warmup_state["steps"]}
+    if not warmup_state["ready"]:
+        return JSONResponse(body, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return body
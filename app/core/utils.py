@@ -1,43 +1,220 @@
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from contextlib import contextmanager
+from sqlalchemy import case, func, insert, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.api.models import APIUsage
+from app.api.models import APIKeyUsageShard, APIUsage, APIUsageDaily
+from app.config import settings
 from app.auth.models import User, UserStatus
-from typing import Dict, Any
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Tuple
+import random
 
-load_dotenv()
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
-SMTP_SERVER = os.environ.get("SMTP_SERVER")
-SMTP_PORT = os.environ.get("SMTP_PORT")
-LOGIN_EMAIL = os.environ.get("LOGIN_EMAIL")
-SENDER_EMAIL = os.environ.get("SENDER_EMAIL")
-LOGIN_PASSWORD = os.environ.get("LOGIN_PASSWORD")
 
+def _increment_or_insert(db: Session, model, filters, increments, new_row) -> None:
+    """Apply ``increments`` to the row matching ``filters``, creating it if missing."""
+    if db.query(model).filter(*filters).update(increments, synchronize_session=False):
+        return
 
-def send_email(to_email: str, subject: str, body: str):
+    # Row does not exist yet; another worker may race us to create it
+    try:
+        with db.begin_nested():
+            db.add(new_row)
+    except IntegrityError:
+        db.query(model).filter(*filters).update(increments, synchronize_session=False)
+
+
+def increment_key_usage(db: Session, api_key_id: int, count: int = 1) -> None:
     """
-    Send an email using SMTP.
+    Count ``count`` calls against an API key on a randomly chosen counter
+    shard, so concurrent requests for the same key rarely update the same row.
     """
-    # Create the email message
-    message = MIMEMultipart()
-    message["From"] = SENDER_EMAIL
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.attach(MIMEText(body, "plain"))
+    shard = random.randrange(settings.USAGE_COUNTER_SHARDS)
+    _increment_or_insert(
+        db,
+        APIKeyUsageShard,
+        (
+            APIKeyUsageShard.api_key_id == api_key_id,
+            APIKeyUsageShard.shard == shard,
+        ),
+        {APIKeyUsageShard.count: APIKeyUsageShard.count + count},
+        APIKeyUsageShard(api_key_id=api_key_id, shard=shard, count=count),
+    )
 
-    # Send the email
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(LOGIN_EMAIL, LOGIN_PASSWORD)
-            server.sendmail(SENDER_EMAIL, to_email, message.as_string())
-    except Exception as e:
-        raise Exception(f"Failed to send email: {str(e)}")
+
+def log_api_usage(
+    db: Session,
+    user_id: int,
+    api_key_id: int,
+    endpoint: str,
+    is_success: bool,
+    response_time: float,
+) -> APIUsage:
+    """
+    Record a single API call, fold it into the daily rollup and count it
+    against the API key. The caller is responsible for committing the session.
+    """
+    return log_api_usage_batch(
+        db, user_id, api_key_id, endpoint, [(is_success, response_time)]
+    )[0]
+
+
+def log_api_usage_batch(
+    db: Session,
+    user_id: int,
+    api_key_id: int,
+    endpoint: str,
+    calls: List[Tuple[bool, float]],
+) -> List[APIUsage]:
+    """
+    Record several calls to one endpoint, given as ``(is_success,
+    response_time)`` pairs. Each call gets its own ``api_usage`` row, but
+    the daily rollup and the key counter are updated once for the batch.
+    The caller is responsible for committing the session.
+    """
+    usage_logs = [
+        APIUsage(
+            user_id=user_id,
+            api_key_id=api_key_id,
+            endpoint=endpoint,
+            is_success=is_success,
+            response_time=response_time,
+        )
+        for is_success, response_time in calls
+    ]
+    db.add_all(usage_logs)
+
+    successes = sum(1 for is_success, _ in calls if is_success)
+    response_time_sum = sum(response_time or 0 for _, response_time in calls)
+    today = datetime.now().date()
+    _increment_or_insert(
+        db,
+        APIUsageDaily,
+        (
+            APIUsageDaily.user_id == user_id,
+            APIUsageDaily.api_key_id == api_key_id,
+            APIUsageDaily.endpoint == endpoint,
+            APIUsageDaily.day == today,
+        ),
+        {
+            APIUsageDaily.calls: APIUsageDaily.calls + len(calls),
+            APIUsageDaily.successes: APIUsageDaily.successes + successes,
+            APIUsageDaily.response_time_sum: APIUsageDaily.response_time_sum
+            + response_time_sum,
+        },
+        APIUsageDaily(
+            user_id=user_id,
+            api_key_id=api_key_id,
+            endpoint=endpoint,
+            day=today,
+            calls=len(calls),
+            successes=successes,
+            response_time_sum=response_time_sum,
+        ),
+    )
+    increment_key_usage(db, api_key_id, len(calls))
+
+    return usage_logs
+
+
+async def log_api_usage_async(db: "AsyncSession", **usage) -> APIUsage:
+    """Async counterpart of log_api_usage, sharing its rollup logic."""
+    return await db.run_sync(lambda session: log_api_usage(session, **usage))
+
+
+def backfill_usage_rollups(db: Session) -> int:
+    """
+    Add ``api_usage_daily`` rows for days with raw ``api_usage`` history but
+    no rollups yet. Days that already have rollups are left alone: their
+    raw rows may have been purged by retention, so they cannot be rebuilt.
+    Returns the number of rollup rows written.
+    """
+    day = func.date(APIUsage.timestamp).label("day")
+    history = (
+        db.query(
+            APIUsage.user_id,
+            APIUsage.api_key_id,
+            APIUsage.endpoint,
+            day,
+            func.count(APIUsage.id).label("calls"),
+            func.sum(case((APIUsage.is_success == True, 1), else_=0)).label(
+                "successes"
+            ),
+            func.coalesce(func.sum(APIUsage.response_time), 0).label(
+                "response_time_sum"
+            ),
+        )
+        .group_by(APIUsage.user_id, APIUsage.api_key_id, APIUsage.endpoint, day)
+        .all()
+    )
+
+    rolled_up = {day for (day,) in db.query(APIUsageDaily.day).distinct()}
+    rows = []
+    for row in history:
+        date = row.day
+        if isinstance(date, str):
+            date = datetime.fromisoformat(date).date()
+        if date in rolled_up:
+            continue
+        rows.append(
+            {
+                "user_id": row.user_id,
+                "api_key_id": row.api_key_id,
+                "endpoint": row.endpoint,
+                "day": date,
+                "calls": row.calls,
+                "successes": int(row.successes or 0),
+                "response_time_sum": row.response_time_sum,
+            }
+        )
+    if rows:
+        db.execute(insert(APIUsageDaily), rows)
+    db.commit()
+    return len(rows)
+
+
+@contextmanager
+def named_lock(db: Session, name: str, timeout: int) -> Iterator[bool]:
+    """
+    Hold a MySQL named lock for the duration of the block, and yield whether
+    it was acquired within ``timeout`` seconds. The lock is taken on a
+    connection of its own, so commits made through ``db`` do not drop it.
+    Other backends run single-process here and always get ``True``.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "mysql":
+        yield True
+        return
+    with bind.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": name, "timeout": timeout},
+        ).scalar()
+        try:
+            yield acquired == 1
+        finally:
+            if acquired == 1:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+def backfill_usage_rollups_if_empty(db: Session) -> None:
+    """
+    Backfill rollups once, when the table is new but raw history exists.
+
+    Every worker calls this at startup. The first to take the lock runs the
+    backfill; the others wait for it and then find the table filled.
+    """
+    with named_lock(db, "api_usage_daily_backfill", timeout=600) as acquired:
+        if not acquired:
+            # Still running elsewhere after the timeout; leave it to that worker
+            return
+        if db.query(APIUsageDaily.id).first() is not None:
+            return
+        if db.query(APIUsage.id).first() is None:
+            return
+        backfill_usage_rollups(db)
 
 
 def get_usage_stats(user_id: int, db: Session, days: int = 30) -> Dict[str, Any]:
@@ -46,29 +223,26 @@ def get_usage_stats(user_id: int, db: Session, days: int = 30) -> Dict[str, Any]
 
     daily_usage = (
         db.query(
-            func.date(APIUsage.timestamp).label("date"),
-            func.count(APIUsage.id).label("count"),
+            APIUsageDaily.day,
+            func.sum(APIUsageDaily.calls),
+            func.sum(APIUsageDaily.successes),
         )
-        .filter(APIUsage.user_id == user_id, APIUsage.timestamp >= start_date)
-        .group_by(func.date(APIUsage.timestamp))
+        .filter(APIUsageDaily.user_id == user_id)
+        .group_by(APIUsageDaily.day)
         .all()
     )
 
     # Create a dict with all dates
     usage_dict = {(start_date + timedelta(days=i)): 0 for i in range(days + 1)}
 
-    # Fill in actual usage
-    for date, count in daily_usage:
-        usage_dict[date] = count
-
-    # Calculate success rate
-    total_calls = db.query(APIUsage).filter(APIUsage.user_id == user_id).count()
-
-    successful_calls = (
-        db.query(APIUsage)
-        .filter(APIUsage.user_id == user_id, APIUsage.is_success == True)
-        .count()
-    )
+    # Fill in actual usage and totals
+    total_calls = 0
+    successful_calls = 0
+    for date, calls, successes in daily_usage:
+        total_calls += int(calls)
+        successful_calls += int(successes)
+        if date in usage_dict:
+            usage_dict[date] = int(calls)
 
     success_rate = (successful_calls / total_calls * 100) if total_calls > 0 else 0
 
@@ -80,14 +254,47 @@ def get_usage_stats(user_id: int, db: Session, days: int = 30) -> Dict[str, Any]
     }
 
 
+async def get_usage_stats_async(
+    user_id: int, db: "AsyncSession", days: int = 30
+) -> Dict[str, Any]:
+    return await db.run_sync(lambda session: get_usage_stats(user_id, session, days))
+
+
+def _usage_version_statement(user_id: int):
+    latest_usage = (
+        select(func.max(APIUsage.id))
+        .where(APIUsage.user_id == user_id)
+        .scalar_subquery()
+    )
+    return select(latest_usage, User.status).where(User.id == user_id)
+
+
+def get_usage_version(user_id: int, db: Session) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Return the user's latest ``api_usage.id`` and current status.
+
+    Every logged call gets a higher id, so the pair only changes when the
+    user's stats or limits may have changed, and it is read without any
+    aggregation over the usage tables.
+    """
+    row = db.execute(_usage_version_statement(user_id)).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+async def get_usage_version_async(
+    user_id: int, db: "AsyncSession"
+) -> Tuple[Optional[int], Optional[str]]:
+    row = (await db.execute(_usage_version_statement(user_id))).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
 def check_user_limit(user_id: int, db: Session) -> bool:
     """
     Check if user has reached their monthly limit
     Returns True if user can make more requests, False otherwise
     """
     # Get the first day of current month
-    today = datetime.now()
-    start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start_of_month = datetime.now().date().replace(day=1)
 
     # Get user status
     user = db.query(User).filter(User.id == user_id).first()
@@ -96,12 +303,28 @@ def check_user_limit(user_id: int, db: Session) -> bool:
     if user.status == UserStatus.DONATUR:
         return True
 
-    # Count this month's usage
+    # Count this month's usage from the rollups, which outlive raw retention
     monthly_usage = (
-        db.query(func.count(APIUsage.id))
-        .filter(APIUsage.user_id == user_id, APIUsage.timestamp >= start_of_month)
+        db.query(func.coalesce(func.sum(APIUsageDaily.calls), 0))
+        .filter(APIUsageDaily.user_id == user_id, APIUsageDaily.day >= start_of_month)
         .scalar()
     )
 
     # FREE users have 100 requests per month limit
     return monthly_usage < 100
+
+
+async def check_user_limit_async(user_id: int, db: "AsyncSession") -> bool:
+    """Async counterpart of check_user_limit."""
+    start_of_month = datetime.now().date().replace(day=1)
+
+    user = await db.get(User, user_id)
+    if user.status == UserStatus.DONATUR:
+        return True
+
+    monthly_usage = await db.scalar(
+        select(func.coalesce(func.sum(APIUsageDaily.calls), 0)).where(
+            APIUsageDaily.user_id == user_id, APIUsageDaily.day >= start_of_month
+        )
+    )
+    return monthly_usage < 100
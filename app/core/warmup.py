@@ -0,0 +1,133 @@
+"""
+Startup warm-up, run in the background once the app has started.
+
+Everything the first customer request would otherwise initialize lazily is
+done here: the disposable domain list, the validator's patterns, a few pooled
+DB connections and, optionally, MX records for the most popular domains.
+It then builds the typo-suggestion index, including domains whose MX
+records were just fetched, and rebuilds it every
+``SUGGESTION_INDEX_REFRESH_INTERVAL`` seconds so domains seen since are
+picked up. ``/ready`` reports ready once the warm-up finishes, so traffic is
+not routed to a cold worker. Steps are best-effort; a failed step is recorded and the worker
+still becomes ready, as it would have retried lazily before.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.core.metrics import register_metrics
+from app.database import async_engine, engine
+from app.validation import EmailValidator, refresh_domain_index
+from app.validation import domains as validation_domains
+from app.validation.config import POPULAR_DOMAINS
+
+warmup_state: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "steps": {},
+}
+
+_task: Optional[asyncio.Task] = None
+
+
+def _warm_db_pool(connections: int) -> None:
+    """Open ``connections`` pooled connections at once, then return them."""
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+async def _warm_async_db_pool(connections: int) -> None:
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = await async_engine.connect()
+            opened.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            await connection.close()
+
+
+def _load_disposable_domains() -> None:
+    validation_domains.load_disposable_domains()
+    if not validation_domains.disposable_domains_loaded:
+        raise RuntimeError("Disposable domain list could not be loaded")
+
+
+def _warm_validator() -> None:
+    """Run the parsing path once so patterns and Unicode tables are loaded."""
+    EmailValidator("warm.up@example.com")._check_email_pattern("warm.up@example.com")
+
+
+async def _prefetch_mx(domains) -> None:
+    await asyncio.gather(
+        *(run_in_threadpool(validation_domains.is_domain_valid, d) for d in domains)
+    )
+
+
+async def _run_step(name: str, step) -> None:
+    started = time.perf_counter()
+    result = {"ok": True, "error": None}
+    try:
+        await step()
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    warmup_state["steps"][name] = result
+
+
+async def warm_up() -> None:
+    warmup_state["started_at"] = datetime.now()
+    connections = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+
+    await _run_step(
+        "disposable_domains", lambda: run_in_threadpool(_load_disposable_domains)
+    )
+    await _run_step("validator", lambda: run_in_threadpool(_warm_validator))
+    await _run_step("db_pool", lambda: run_in_threadpool(_warm_db_pool, connections))
+    if async_engine is not None:
+        await _run_step("async_db_pool", lambda: _warm_async_db_pool(connections))
+    if settings.WARMUP_MX_DOMAINS > 0:
+        domains = POPULAR_DOMAINS[: settings.WARMUP_MX_DOMAINS]
+        await _run_step("mx_records", lambda: _prefetch_mx(domains))
+    await _run_step("domain_index", lambda: run_in_threadpool(refresh_domain_index))
+
+    warmup_state["finished_at"] = datetime.now()
+    warmup_state["ready"] = True
+
+    interval = settings.SUGGESTION_INDEX_REFRESH_INTERVAL
+    while interval > 0:
+        await asyncio.sleep(interval)
+        await _run_step("domain_index", lambda: run_in_threadpool(refresh_domain_index))
+
+
+def start_warmup() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(warm_up())
+
+
+async def stop_warmup() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+register_metrics("warmup", lambda: dict(warmup_state))
@@ -1,15 +1,64 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.requests import HTTPConnection
 from .config import settings
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class PoolWaitStatsMixin:
+    """Records how long callers wait for a pooled connection."""
+
+    stats_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Survives engine.dispose(), which recreates the pool
+        cls.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "wait_total_ms": 0.0,
+            "wait_max_ms": 0.0,
+        }
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with self.stats_lock:
+                self.stats["checkouts"] += 1
+                self.stats["timeouts"] += int(timed_out)
+                self.stats["wait_total_ms"] += waited
+                self.stats["wait_max_ms"] = max(self.stats["wait_max_ms"], waited)
+
+
+class InstrumentedQueuePool(PoolWaitStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(PoolWaitStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
 # Create MySQL engine
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
     pool_recycle=1800,
 )
@@ -17,10 +66,101 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Optional AsyncEngine so that queries no longer block the event loop
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def get_request_db(connection: HTTPConnection) -> Session:
+    """Return the session bound to this request, creating it on first use."""
+    db = getattr(connection.state, "db", None)
+    if db is None:
+        db = SessionLocal()
+        connection.state.db = db
+    return db
+
+
+def close_request_db(connection: HTTPConnection) -> None:
+    """Close the request's session, if one was opened, and return it to the pool."""
+    db = getattr(connection.state, "db", None)
+    if db is not None:
+        connection.state.db = None
+        db.close()
+
 
-def get_db():
-    db = SessionLocal()
+def get_db(connection: HTTPConnection):
+    # The session middleware closes the session once the response is sent;
+    # without it (e.g. websockets) the dependency owns the session itself.
+    managed = getattr(connection.state, "db_managed", False)
+    db = get_request_db(connection)
     try:
         yield db
     finally:
-        db.close()
+        if not managed:
+            close_request_db(connection)
+
+
+def get_request_async_db(connection: HTTPConnection) -> "AsyncSession":
+    """Async counterpart of get_request_db, used when DB_ASYNC is enabled."""
+    db = getattr(connection.state, "async_db", None)
+    if db is None:
+        db = AsyncSessionLocal()
+        connection.state.async_db = db
+    return db
+
+
+async def close_request_async_db(connection: HTTPConnection) -> None:
+    db = getattr(connection.state, "async_db", None)
+    if db is not None:
+        connection.state.async_db = None
+        await db.close()
+
+
+async def get_async_db(connection: HTTPConnection):
+    managed = getattr(connection.state, "db_managed", False)
+    db = get_request_async_db(connection)
+    try:
+        yield db
+    finally:
+        if not managed:
+            await close_request_async_db(connection)
+
+
+def _pool_snapshot(pool) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if isinstance(pool, PoolWaitStatsMixin):
+        with pool.stats_lock:
+            stats.update(pool.stats)
+        checkouts = stats["checkouts"]
+        stats["wait_avg_ms"] = stats["wait_total_ms"] / checkouts if checkouts else 0
+    return stats
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Snapshot of connection pool usage for sizing the pool."""
+    stats = _pool_snapshot(engine.pool)
+    if async_engine is not None:
+        stats["async"] = _pool_snapshot(async_engine.sync_engine.pool)
+    return stats
@@ -1,18 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from .core.middleware import authenticate_user_middleware, log_api_requests
-from .database import Base, engine
+from .config import settings
+from .core.compression import CompressionMiddleware
+from .core.middleware import db_session_middleware, log_api_requests
+from .database import Base, SessionLocal, engine
+from .core.utils import backfill_usage_rollups_if_empty
+from .core.retention import start_retention_job, stop_retention_job
+from .core.warmup import start_warmup, stop_warmup
+from .core.mailer import start_mailer, stop_mailer
+from .webhooks.processor import start_webhook_processor, stop_webhook_processor
 from .web.routes import router as web_router
 from .api.routes import router as api_router
 from .auth.routes import router as auth_router
 from .services.routes import router as services_router
 from .webhooks.routes import router as webhooks_router
+from .core.routes import router as core_router
+from .web.assets import PrecompressedStaticFiles
 from fastapi.openapi.utils import get_openapi
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        backfill_usage_rollups_if_empty(db)
+    finally:
+        db.close()
+
+    start_retention_job()
+    start_mailer()
+    start_webhook_processor()
+    # Runs in the background; /ready turns 200 once it is done
+    start_warmup()
+    yield
+    await stop_warmup()
+    await stop_webhook_processor()
+    await stop_retention_job()
+    await stop_mailer()
+
 
 app = FastAPI(
     title="YourEmailValidator API",
@@ -21,10 +49,11 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 # CORS middleware
 app.add_middleware(
@@ -36,8 +65,16 @@ app.add_middleware(
 )
 
 # Custom middleware
-app.middleware("http")(authenticate_user_middleware)
 app.middleware("http")(log_api_requests)
+app.middleware("http")(db_session_middleware)
+
+# Response compression (outermost, so it sees the final body)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+)
 
 # Include routers
 app.include_router(web_router)
@@ -45,6 +82,7 @@ app.include_router(api_router)
 app.include_router(auth_router)
 app.include_router(services_router)
 app.include_router(webhooks_router)
+app.include_router(core_router)
 
 
 def custom_get_openapi():
@@ -80,12 +118,6 @@ def custom_get_openapi():
 app.openapi = custom_get_openapi
 
 
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup_event():
-    Base.metadata.create_all(bind=engine)
-
-
 if __name__ == "__main__":
     import uvicorn
 
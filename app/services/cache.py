@@ -0,0 +1,39 @@
+"""
+Validation caches, configured from settings.
+
+MX answers are always cached in memory. With ``CACHE_REDIS_URL`` set they
+are also shared through Redis, so a domain resolved by one worker is not
+resolved again by the others. How long expired answers may still be served
+is set by ``MX_STALE_WHILE_REVALIDATE`` and ``MX_MAX_STALE``. DNS timeouts
+and circuit breakers are reported under ``dns`` on ``/metrics``.
+"""
+
+from app.config import settings
+from app.core.metrics import register_metrics
+from app.validation import MemoryBackend, RedisBackend, ResultCache, TieredCache
+from app.validation import domains as validation_domains
+from app.validation.config import MX_CACHE_SIZE
+from app.validation.resolver import mx_resolver
+
+result_cache = ResultCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL)
+
+validation_domains.set_mx_stale_policy(
+    settings.MX_STALE_WHILE_REVALIDATE, settings.MX_MAX_STALE
+)
+
+if settings.CACHE_REDIS_URL:
+    validation_domains.use_mx_cache(
+        TieredCache(
+            MemoryBackend(MX_CACHE_SIZE),
+            RedisBackend(
+                settings.CACHE_REDIS_URL,
+                prefix=settings.CACHE_REDIS_PREFIX,
+                timeout=settings.CACHE_REDIS_TIMEOUT,
+                retry_interval=settings.CACHE_REDIS_RETRY_INTERVAL,
+            ),
+        )
+    )
+
+register_metrics("result_cache", result_cache.get_stats)
+register_metrics("mx_cache", lambda: validation_domains.mx_cache.get_stats())
+register_metrics("dns", mx_resolver.get_stats)
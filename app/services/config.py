@@ -1 +1,2 @@
-DISPOSABLE_URL = "https://disposable.github.io/disposable-email-domains/domains_mx.json"
+# Moved to app.validation.config; kept so existing imports keep working.
+from app.validation.config import DISPOSABLE_URL, POPULAR_DOMAINS  # noqa: F401
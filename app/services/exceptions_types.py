@@ -1,10 +1,6 @@
-class EmailFormatError(Exception):
-    """Raised when the email format is invalid."""
-
-
-class DisposableEmailError(Exception):
-    """Raised when the email domain is disposable."""
-
-
-class EmailMXRecordError(Exception):
-    """Raised when the email domain has no valid MX records."""
+# Moved to app.validation.exceptions; kept so existing imports keep working.
+from app.validation.exceptions import (  # noqa: F401
+    DisposableEmailError,
+    EmailFormatError,
+    EmailMXRecordError,
+)
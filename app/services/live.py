@@ -0,0 +1,300 @@
+"""
+As-you-type validation over a WebSocket, served at ``/api/v1/ws/validate``.
+
+The API key (``X-API-Key`` header, or ``api_key`` query parameter for
+browsers) is checked once, when the connection opens. The client then sends
+one JSON message per change of the field::
+
+    {"id": 7, "email": "jane@gmial.co", "final": false}
+
+Partial messages get a format check and a typo suggestion, without any
+lookup, and are free. Final messages (``"final": true``, e.g. on blur or
+submit) get the full validation of ``/validate-email``, through the same
+result cache, and count as API calls. Each message supersedes the previous
+one: a final validation still running is cancelled and never answered.
+
+Replies echo the ``id`` and carry the fields of ``EmailResponse``::
+
+    {"id": 7, "final": false, "email": "jane@gmial.co", "is_valid": true,
+     "message": "Email format is valid.", "suggestion": "jane@gmail.co",
+     "stale": false}
+
+Calls are logged in batches of ``WS_USAGE_BATCH_SIZE``, at least every
+``WS_USAGE_FLUSH_INTERVAL`` seconds and when the connection closes. Users
+with a monthly limit are logged after every call and disconnected once they
+reach it.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+from fastapi import WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from starlette.websockets import WebSocketState
+
+from app.api.models import APIKey
+from app.auth.dependencies import verify_api_key
+from app.auth.models import UserStatus
+from app.config import settings
+from app.core.events import usage_notifier
+from app.core.metrics import register_metrics
+from app.core.utils import check_user_limit, log_api_usage_batch
+from app.database import SessionLocal
+from app.validation import EmailFormatError, EmailValidator
+from .cache import result_cache
+
+ENDPOINT = "/api/v1/ws/validate"
+LIMIT_REACHED = (
+    "Monthly API limit reached. Please upgrade to Donatur status for unlimited access."
+)
+
+MALFORMED = 'Expected {"id", "email", "final"}.'
+
+stats = {"connections": 0, "partial": 0, "final": 0, "cancelled": 0}
+
+
+def _authenticate(api_key: str) -> Tuple[Optional["UsageBatch"], Optional[str]]:
+    """The connection's usage batch, or None and the reason it is refused."""
+    db = SessionLocal()
+    try:
+        user = verify_api_key(api_key, db)
+        if not user:
+            return None, "Invalid API key"
+        if not check_user_limit(user.id, db):
+            return None, LIMIT_REACHED
+        record = (
+            db.query(APIKey)
+            .filter(APIKey.key == api_key, APIKey.is_active == True)
+            .first()
+        )
+        return UsageBatch(user.id, record.id, user.status != UserStatus.DONATUR), None
+    finally:
+        db.close()
+
+
+class UsageBatch:
+    """Calls made on one connection that have not been logged yet."""
+
+    def __init__(self, user_id: int, api_key_id: int, limited: bool):
+        self.user_id = user_id
+        self.api_key_id = api_key_id
+        self.limited = limited
+        # Unlimited users can afford to have their calls logged late
+        self.batch_size = 1 if limited else settings.WS_USAGE_BATCH_SIZE
+        self.calls: List[Tuple[bool, float]] = []
+        self.exhausted = False
+        self._lock = asyncio.Lock()
+
+    def add(self, is_success: bool, response_time: float) -> bool:
+        """Queue a call. Returns whether the batch should be flushed now."""
+        self.calls.append((is_success, response_time))
+        return len(self.calls) >= self.batch_size
+
+    def _write(self, calls: List[Tuple[bool, float]]) -> bool:
+        db = SessionLocal()
+        try:
+            if calls:
+                log_api_usage_batch(db, self.user_id, self.api_key_id, ENDPOINT, calls)
+                db.commit()
+            return not self.limited or check_user_limit(self.user_id, db)
+        finally:
+            db.close()
+
+    async def flush(self) -> bool:
+        """Log the queued calls. Returns whether the user may make more."""
+        async with self._lock:
+            calls, self.calls = self.calls, []
+            if not calls:
+                return not self.exhausted
+            try:
+                # Shielded: once started, a write completes even if the
+                # connection's tasks are cancelled
+                allowed = await asyncio.shield(run_in_threadpool(self._write, calls))
+            except Exception:
+                # Keep them for the next flush rather than lose them
+                self.calls[:0] = calls
+                raise
+            usage_notifier.notify(self.user_id)
+            self.exhausted = not allowed
+            return allowed
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    # Text frames, so browsers get strings rather than Blobs
+    return orjson.dumps(payload).decode()
+
+
+def _reply(message_id: Any, final: bool, email: str, **fields) -> str:
+    return _dumps({"id": message_id, "final": final, "email": email, **fields})
+
+
+def _check_partial(email: str) -> Dict[str, Any]:
+    try:
+        result = EmailValidator(email).check_syntax()
+    except (EmailFormatError, ValueError):
+        return {
+            "is_valid": False,
+            "message": "Invalid email format.",
+            "suggestion": None,
+        }
+    return {
+        "is_valid": result.is_valid,
+        "message": result.message,
+        "suggestion": result.suggestion,
+    }
+
+
+def _validate_final(email: str) -> Dict[str, Any]:
+    try:
+        outcome = result_cache.validate(email)
+    except (EmailFormatError, ValueError):
+        return {
+            "is_valid": False,
+            "message": "Invalid email format.",
+            "suggestion": None,
+        }
+    return {
+        "is_valid": outcome.is_valid,
+        "message": outcome.message,
+        "suggestion": outcome.suggestion,
+        "stale": outcome.stale,
+    }
+
+
+async def _close_for_limit(websocket: WebSocket) -> None:
+    if websocket.application_state == WebSocketState.CONNECTED:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason=LIMIT_REACHED
+        )
+
+
+async def _record_call(
+    websocket: WebSocket, batch: UsageBatch, is_success: bool, response_time: float
+) -> None:
+    if not batch.add(is_success, response_time):
+        return
+    try:
+        allowed = await batch.flush()
+    except Exception as e:
+        print(f"Logging WebSocket usage failed: {e}")
+        return
+    if not allowed:
+        await _close_for_limit(websocket)
+
+
+async def _answer_final(
+    websocket: WebSocket,
+    batch: UsageBatch,
+    recording: Set[asyncio.Task],
+    message_id: Any,
+    email: str,
+) -> None:
+    started = time.perf_counter()
+    # DNS lookups block; cancelling drops the answer, the lookup still fills the cache
+    fields = await run_in_threadpool(_validate_final, email)
+    try:
+        await websocket.send_text(_reply(message_id, True, email, **fields))
+    except Exception:
+        # The client is gone; the receive loop notices and cleans up
+        return
+    response_time = (time.perf_counter() - started) * 1000
+    # A task of its own, so the next message cannot cancel it
+    task = asyncio.create_task(
+        _record_call(websocket, batch, fields["is_valid"], response_time)
+    )
+    recording.add(task)
+    task.add_done_callback(recording.discard)
+
+
+async def _flush_periodically(websocket: WebSocket, batch: UsageBatch) -> None:
+    while True:
+        await asyncio.sleep(settings.WS_USAGE_FLUSH_INTERVAL)
+        try:
+            allowed = await batch.flush()
+        except Exception as e:
+            print(f"Logging WebSocket usage failed: {e}")
+            continue
+        if not allowed:
+            await _close_for_limit(websocket)
+            return
+
+
+async def serve(websocket: WebSocket, api_key: Optional[str]) -> None:
+    """Authenticate, then answer messages until the client disconnects."""
+    if not api_key:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="API key required"
+        )
+        return
+    batch, error = await run_in_threadpool(_authenticate, api_key)
+    if batch is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error)
+        return
+
+    await websocket.accept()
+    stats["connections"] += 1
+    flusher = asyncio.create_task(_flush_periodically(websocket, batch))
+    pending: Optional[asyncio.Task] = None
+    recording: Set[asyncio.Task] = set()
+    try:
+        while True:
+            try:
+                received = await websocket.receive()
+            except RuntimeError:
+                # Closed from our side, for reaching the limit
+                break
+            if received["type"] == "websocket.disconnect":
+                break
+            if pending is not None and not pending.done():
+                pending.cancel()
+                stats["cancelled"] += 1
+            data = received.get("text")
+            if data is None:
+                # A binary frame
+                await websocket.send_text(_dumps({"error": MALFORMED}))
+                continue
+            try:
+                message = orjson.loads(data)
+                message_id = message.get("id")
+                email = message["email"]
+                final = bool(message.get("final", False))
+            except (orjson.JSONDecodeError, AttributeError, KeyError):
+                await websocket.send_text(_dumps({"error": MALFORMED}))
+                continue
+            if not isinstance(email, str):
+                await websocket.send_text(
+                    _dumps({"id": message_id, "error": "email must be a string."})
+                )
+                continue
+
+            if not final:
+                stats["partial"] += 1
+                fields = _check_partial(email)
+                await websocket.send_text(_reply(message_id, False, email, **fields))
+                continue
+
+            if batch.limited:
+                # Know whether the last call reached the limit before the next
+                await asyncio.gather(*recording, return_exceptions=True)
+            if batch.exhausted:
+                await _close_for_limit(websocket)
+                break
+            stats["final"] += 1
+            pending = asyncio.create_task(
+                _answer_final(websocket, batch, recording, message_id, email)
+            )
+    finally:
+        stats["connections"] -= 1
+        flusher.cancel()
+        if pending is not None:
+            pending.cancel()
+        await asyncio.gather(*recording, return_exceptions=True)
+        try:
+            await batch.flush()
+        except Exception as e:
+            print(f"Logging WebSocket usage failed: {e}")
+
+
+register_metrics("validation_sockets", lambda: dict(stats))
@@ -1,37 +1,89 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    Header,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    status,
+)
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from app.api.utils import verify_api_key_header, verify_donatur_access
+from app.config import settings
 from app.auth.models import User, UserStatus
-from .schemas import EmailRequest, DonaturEmailRequest, EmailResponse
-from .email_validator import (
+from app.validation import (
     EmailValidator,
-    EmailFormatError,
-    DisposableEmailError,
-    EmailMXRecordError,
+    EmailResult,
+    canonicalize,
 )
+from app.validation.domains import prefetch_mx_answers
+from . import live
+from .cache import result_cache
+from .schemas import EmailRequest, DonaturEmailRequest, EmailResponse
 from app.api.models import APIKey
+from app.web.cache import etag_matches
 
 router = APIRouter(prefix="/api/v1")
 
+# Bulk rows report a fixed message per kind of failure
+BULK_ERROR_MESSAGES = {
+    "EmailFormatError": "Invalid email format.",
+    "DisposableEmailError": "Disposable email addresses are not allowed.",
+    "EmailMXRecordError": "Domain has no valid MX records.",
+    "MXLookupUnavailableError": "MX lookup is temporarily unavailable.",
+}
+
 
 @router.post("/validate-email", response_model=EmailResponse)
 async def validate_email(
     request: EmailRequest,
+    http_request: Request,
+    response: Response,
     auth: tuple[APIKey, Session] = Depends(verify_api_key_header),
 ):
     """Endpoint to validate a single email."""
     api_key, db = auth
     options = request.model_dump(exclude={"email"})
-    email_validator = EmailValidator(request.email, **options)
-    try:
-        email_validator.validate()
-        return EmailResponse(
-            email=request.email, is_valid=True, message="Email is valid."
+    outcome = result_cache.validate(request.email, **options)
+
+    # Private: the call is authenticated and counts against the caller's quota
+    headers = {
+        "ETag": outcome.etag,
+        "Cache-Control": f"private, max-age={outcome.max_age()}",
+    }
+    if outcome.stale:
+        headers["X-Email-Stale"] = "true"
+    if etag_matches(http_request, outcome.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if outcome.error == "MXLookupUnavailableError":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=outcome.message,
+            headers=headers,
         )
-    except (EmailFormatError, DisposableEmailError, EmailMXRecordError) as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    if not outcome.is_valid:
+        # Header values must be latin-1; the body carries any suggestion
+        if outcome.suggestion and outcome.suggestion.isascii():
+            headers["X-Email-Suggestion"] = outcome.suggestion
+        return ORJSONResponse(
+            {"detail": outcome.message, "suggestion": outcome.suggestion},
+            status_code=400,
+            headers=headers,
+        )
+
+    response.headers.update(headers)
+    return EmailResponse(
+        email=request.email,
+        is_valid=True,
+        message=outcome.message,
+        suggestion=outcome.suggestion,
+        stale=outcome.stale,
+    )
 
 
 @router.post("/check-disposable", response_model=EmailResponse)
@@ -70,6 +122,17 @@ async def check_mx_record_email(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _validate_bulk_email(email: str, options: dict) -> EmailResult:
+    outcome = result_cache.validate(email, **options)
+    if outcome.is_valid:
+        message = outcome.message
+    else:
+        message = BULK_ERROR_MESSAGES[outcome.error]
+    return EmailResult(
+        email, outcome.is_valid, message, outcome.suggestion, stale=outcome.stale
+    )
+
+
 @router.post("/bulk-email-validate", response_model=List[EmailResponse])
 async def bulk_validate_email(
     request: DonaturEmailRequest,
@@ -85,33 +148,32 @@ async def bulk_validate_email(
             detail=f"Maximum {MAX_BULK_EMAILS} emails allowed per request",
         )
 
-    responses = []
-    success_count = 0
-    options = request.model_dump(exclude={"email"})
+    # Results skip per-item Pydantic models and response_model re-validation;
+    # response_model is kept above so the OpenAPI schema stays the same.
+    results = []
+    options = request.model_dump(exclude={"email", "flag_duplicates"})
+    if options["check_deliverability"] and not options["test_environment"]:
+        # One round trip to the shared cache for every domain in the batch
+        prefetch_mx_answers(email.strip().rpartition("@")[2] for email in request.email)
+    # Each canonical mailbox is validated once; repeats share its outcome
+    first_results: Dict[str, EmailResult] = {}
     for email in request.email:
-        email_validator = EmailValidator(email, **options)
-        try:
-            email_validator.validate()
-            response = EmailResponse(
-                email=email, is_valid=True, message="Email is valid."
-            )
-            success_count += 1
-        except EmailFormatError:
-            response = EmailResponse(
-                email=email, is_valid=False, message="Invalid email format."
+        canonical = canonicalize(email)
+        first = first_results.get(canonical)
+        if first is None:
+            result = first_results[canonical] = _validate_bulk_email(email, options)
+        else:
+            suggestion = first.suggestion
+            if email != first.email:
+                suggestion = EmailValidator(email, **options).suggest()
+            result = EmailResult(
+                email, first.is_valid, first.message, suggestion, stale=first.stale
             )
-        except DisposableEmailError:
-            response = EmailResponse(
-                email=email,
-                is_valid=False,
-                message="Disposable email addresses are not allowed.",
-            )
-        except EmailMXRecordError:
-            response = EmailResponse(
-                email=email, is_valid=False, message="Domain has no valid MX records."
-            )
-        responses.append(response)
-    return responses
+        if request.flag_duplicates:
+            result.canonical = canonical
+            result.duplicate = first is not None
+        results.append(result)
+    return ORJSONResponse(results)
 
 
 @router.get("/check-bulk-access")
@@ -120,7 +182,10 @@ async def check_bulk_validation_access(
 ):
     """Check if the current user has access to bulk validation."""
     api_key, db = auth
-    user = db.query(User).filter(User.id == api_key.user_id).first()
+    if settings.DB_ASYNC:
+        user = await db.get(User, api_key.user_id)
+    else:
+        user = db.query(User).filter(User.id == api_key.user_id).first()
 
     return {
         "has_access": user.status == UserStatus.DONATUR,
@@ -128,3 +193,13 @@ async def check_bulk_validation_access(
         "required_status": UserStatus.DONATUR,
         "upgrade_required": user.status != UserStatus.DONATUR,
     }
+
+
+@router.websocket("/ws/validate")
+async def validate_email_stream(
+    websocket: WebSocket,
+    x_api_key: Optional[str] = Header(None),
+    api_key: Optional[str] = Query(None),
+):
+    """Validate addresses as they are typed. See app/services/live.py."""
+    await live.serve(websocket, x_api_key or api_key)
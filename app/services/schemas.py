@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -5,6 +6,10 @@ class EmailResponse(BaseModel):
     email: str
     is_valid: bool
     message: str = None
+    suggestion: Optional[str] = None
+    canonical: Optional[str] = None
+    duplicate: Optional[bool] = None
+    stale: bool = False
 
 
 class EmailRequest(BaseModel):
@@ -22,3 +27,5 @@ class DonaturEmailRequest(BaseModel):
     test_environment: bool = False
     globally_deliverable: bool = True
     timeout: int = 10
+    # Return each address's canonical mailbox and mark repeats of one
+    flag_duplicates: bool = False
@@ -0,0 +1,43 @@
+"""
+Core email validation engine.
+
+Depends only on the standard library at import time. MX lookups import
+``dnspython`` and the disposable list download uses ``requests`` when it is
+installed (falling back to ``urllib``), both on first use; ``redis`` is
+only imported when a ``RedisBackend`` is created. Nothing here
+imports the web app, its settings or the database, so the validator can be
+used from scripts and the command line::
+
+    python -m app.validation user@example.com
+"""
+
+from .backends import CacheBackend, MemoryBackend, RedisBackend, TieredCache
+from .cache import CachedOutcome, ResultCache
+from .canonical import canonicalize
+from .exceptions import (
+    DisposableEmailError,
+    EmailFormatError,
+    EmailMXRecordError,
+    MXLookupUnavailableError,
+)
+from .result import EmailResult
+from .suggest import DomainIndex
+from .validator import EmailValidator, refresh_domain_index
+
+__all__ = [
+    "CacheBackend",
+    "CachedOutcome",
+    "DisposableEmailError",
+    "DomainIndex",
+    "EmailFormatError",
+    "EmailMXRecordError",
+    "EmailResult",
+    "EmailValidator",
+    "MemoryBackend",
+    "MXLookupUnavailableError",
+    "RedisBackend",
+    "ResultCache",
+    "TieredCache",
+    "canonicalize",
+    "refresh_domain_index",
+]
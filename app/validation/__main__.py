@@ -0,0 +1,67 @@
+"""
+Validate email addresses from the command line.
+
+    python -m app.validation user@example.com other@example.org
+    python -m app.validation --no-mx < addresses.txt
+
+Prints one tab-separated line per address (or JSON lines with ``--json``),
+with a suggested correction when the domain looks mistyped, and exits with
+status 1 if any address is invalid.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+
+from . import DisposableEmailError, EmailFormatError, EmailMXRecordError
+from .result import EmailResult
+from .validator import EmailValidator
+
+
+def validate(email: str, **options) -> EmailResult:
+    try:
+        validator = EmailValidator(email, **options)
+    except EmailFormatError as e:
+        return EmailResult(email, False, str(e))
+    except ValueError:
+        # Addresses without an "@" fail while being split
+        return EmailResult(email, False, "Invalid email format.")
+    try:
+        return validator.validate()
+    except (EmailFormatError, DisposableEmailError, EmailMXRecordError) as e:
+        return EmailResult(email, False, str(e), validator.suggest())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.validation",
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("emails", nargs="*", help="addresses; read from stdin if none")
+    parser.add_argument(
+        "--no-mx", action="store_true", help="skip the MX record lookup"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print one JSON object per line"
+    )
+    args = parser.parse_args(argv)
+
+    emails = args.emails or [line.strip() for line in sys.stdin if line.strip()]
+    all_valid = True
+    for email in emails:
+        result = validate(email, check_deliverability=not args.no_mx)
+        all_valid = all_valid and result.is_valid
+        if args.json:
+            print(json.dumps(asdict(result)))
+        else:
+            status = "valid" if result.is_valid else "invalid"
+            line = f"{result.email}\t{status}\t{result.message}"
+            if result.suggestion:
+                line += f"\tdid you mean {result.suggestion}?"
+            print(line)
+    return 0 if all_valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
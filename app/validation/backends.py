@@ -0,0 +1,200 @@
+"""
+Cache backends for lookups worth sharing between workers and hosts.
+
+``MemoryBackend`` is a bounded in-process cache. ``RedisBackend`` talks to
+anything that speaks the Redis protocol; ``redis`` is imported when one is
+created. ``TieredCache`` puts the first in front of the second: reads try
+memory, then fetch all remaining keys from Redis with a single ``MGET``,
+and copy what they find into memory.
+
+Redis is an optimization, never a dependency of a validation: any error is
+treated as a miss, and the backend skips Redis for ``retry_interval``
+seconds before trying again.
+
+Values must be JSON-serializable. Every entry carries its absolute expiry
+time (a Unix timestamp), so an entry copied from Redis into memory expires
+at the same moment everywhere.
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# (value, expires at)
+Entry = Tuple[Any, float]
+
+
+class CacheBackend(ABC):
+    """Interface shared by the backends below. ``ttl`` is in seconds."""
+
+    def get(self, key: str) -> Optional[Entry]:
+        return self.get_many([key]).get(key)
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        """Entries found for ``keys``; keys that are missing or expired are left out."""
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.set_many({key: value}, ttl)
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        """Store every item in ``items`` for ``ttl`` seconds."""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """Bounded LRU with per-entry expiry. Safe to use from several threads."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None or entry[1] <= now:
+                    self.entries.pop(key, None)
+                    self.stats["misses"] += 1
+                    continue
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                found[key] = entry
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        self.put_many({key: (value, expires_at) for key, value in items.items()})
+
+    def put_many(self, entries: Dict[str, Entry]) -> None:
+        """Store entries that already carry their expiry time."""
+        with self._lock:
+            for key, entry in entries.items():
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"size": len(self.entries), "max_size": self.max_entries, **self.stats}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis-protocol backend. Pass ``client`` to use an existing client (or a
+    stand-in with the same ``mget``/``pipeline`` API) instead of ``url``.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        prefix: str = "emailvalidator:",
+        timeout: float = 0.1,
+        retry_interval: float = 5.0,
+        client=None,
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(
+                url, socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+        self.client = client
+        self.prefix = prefix
+        self.retry_interval = retry_interval
+        self.stats: Dict[str, Any] = {
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "last_error": None,
+        }
+        self._skip_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._skip_until
+
+    def _failed(self, error: Exception) -> None:
+        self.stats["errors"] += 1
+        self.stats["last_error"] = str(error)
+        self._skip_until = time.monotonic() + self.retry_interval
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        keys = list(keys)
+        if not keys or not self._available():
+            return {}
+        try:
+            values = self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            # Fail open: whatever went wrong, the caller just does the lookup
+            self._failed(e)
+            return {}
+
+        now = time.time()
+        found = {}
+        for key, data in zip(keys, values):
+            if data is None:
+                continue
+            try:
+                value, expires_at = json.loads(data)
+            except (TypeError, ValueError):
+                # Written by something else; treat as a miss and let it be overwritten
+                continue
+            if expires_at > now:
+                found[key] = (value, expires_at)
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if not items or not self._available():
+            return
+        expires_at = time.time() + ttl
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                data = json.dumps([value, expires_at])
+                pipeline.set(self.prefix + key, data, px=max(int(ttl * 1000), 1))
+            pipeline.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "available": self._available()}
+
+
+class TieredCache(CacheBackend):
+    """An in-process ``MemoryBackend`` in front of an optional shared backend."""
+
+    def __init__(self, local: MemoryBackend, shared: Optional[CacheBackend] = None):
+        self.local = local
+        self.shared = shared
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Entry]:
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        if self.shared is not None and len(found) < len(keys):
+            fetched = self.shared.get_many(key for key in keys if key not in found)
+            self.local.put_many(fetched)
+            found.update(fetched)
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        self.local.set_many(items, ttl)
+        if self.shared is not None:
+            self.shared.set_many(items, ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"local": self.local.get_stats()}
+        if self.shared is not None:
+            stats["shared"] = self.shared.get_stats()
+        return stats
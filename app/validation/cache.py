@@ -0,0 +1,162 @@
+"""
+Cache of validation outcomes, for addresses that are checked again and again
+(form retries, double submits).
+
+Entries are keyed by the normalized address and a fingerprint of the
+effective options. An entry lives as long as the MX answer it was derived
+from, capped at ``max_ttl``, and is dropped once a newer disposable domain
+list has been loaded. Outcomes based on a stale MX answer, or on a lookup
+that was unavailable, are not cached. A hit needs no parsing and no DNS.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from . import domains
+from .exceptions import (
+    DisposableEmailError,
+    EmailFormatError,
+    EmailMXRecordError,
+    MXLookupUnavailableError,
+)
+from .validator import DEFAULT_OPTIONS, EmailValidator
+
+
+@dataclass(slots=True)
+class CachedOutcome:
+    is_valid: bool
+    message: str
+    suggestion: Optional[str]
+    # Name of the exception that made the address invalid
+    error: Optional[str]
+    etag: str
+    expires_at: float
+    disposable_version: int
+    # Derived from an expired MX answer
+    stale: bool = False
+
+    def max_age(self) -> int:
+        return max(int(self.expires_at - time.time()), 0)
+
+
+def normalize_address(email: str) -> str:
+    """Strip surrounding whitespace and lowercase the domain."""
+    address = email.strip()
+    local_part, at, domain = address.rpartition("@")
+    if not at:
+        return address
+    return f"{local_part}@{domain.lower()}"
+
+
+def options_fingerprint(options: Dict[str, Any]) -> str:
+    effective = {**DEFAULT_OPTIONS, **options}
+    encoded = json.dumps(effective, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def cache_key(email: str, options: Dict[str, Any]) -> str:
+    return f"{options_fingerprint(options)}:{normalize_address(email)}"
+
+
+class ResultCache:
+    """
+    Bounded LRU of validation outcomes with per-entry expiry. Safe to use
+    from several threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_ttl: float = 3600):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.entries: "OrderedDict[str, CachedOutcome]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedOutcome]:
+        now = time.time()
+        with self._lock:
+            outcome = self.entries.get(key)
+            if outcome is None:
+                self.stats["misses"] += 1
+                return None
+            if (
+                outcome.expires_at <= now
+                or outcome.disposable_version != domains.disposable_domains_version
+            ):
+                self.entries.pop(key, None)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return outcome
+
+    def put(self, key: str, outcome: CachedOutcome) -> None:
+        with self._lock:
+            self.entries[key] = outcome
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def ttl(self, domain: str) -> float:
+        """How long an outcome for ``domain`` may be reused."""
+        ttl = domains.mx_ttl(domain.lower())
+        return self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+
+    def validate(self, email: str, **options) -> CachedOutcome:
+        """
+        The outcome of validating ``email``, from the cache when possible.
+        Raises what ``EmailValidator`` raises for addresses it cannot split.
+        """
+        key = cache_key(email, options)
+        outcome = self.get(key)
+        if outcome is not None:
+            return outcome
+
+        # The address the key was made from, so equal keys mean equal outcomes
+        email_validator = EmailValidator(normalize_address(email), **options)
+        unavailable = False
+        try:
+            email_validator.validate()
+            is_valid, message, error = True, "Email is valid.", None
+        except (EmailFormatError, DisposableEmailError, EmailMXRecordError) as e:
+            is_valid, message, error = False, str(e), type(e).__name__
+            unavailable = isinstance(e, MXLookupUnavailableError)
+        # After validating, so a domain just found to have MX records is not
+        # offered a "correction"
+        suggestion = email_validator.suggest()
+
+        stale = email_validator.stale
+        # Only good for this request: it must not outlive a fresh lookup
+        transient = stale or unavailable
+        tag = f"{key}|{is_valid}|{message}|{suggestion}|{stale}"
+        ttl = 0 if transient else self.ttl(email_validator.domain)
+        outcome = CachedOutcome(
+            is_valid=is_valid,
+            message=message,
+            suggestion=suggestion,
+            error=error,
+            etag=f'"{hashlib.sha1(tag.encode()).hexdigest()[:20]}"',
+            expires_at=time.time() + ttl,
+            disposable_version=domains.disposable_domains_version,
+            stale=stale,
+        )
+        if not transient:
+            self.put(key, outcome)
+        return outcome
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_entries,
+                **self.stats,
+            }
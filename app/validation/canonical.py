@@ -0,0 +1,35 @@
+"""
+Canonical mailboxes, for spotting the same mailbox written differently.
+
+"John.Doe+news@GoogleMail.com" and "johndoe@gmail.com" are delivered to
+the same inbox. The canonical form lowercases the address, resolves domain
+aliases, drops sub-address tags and, where the provider ignores them, dots
+in the local part. Rules are per provider (config.py); other domains are
+only lowercased.
+"""
+
+from .config import DOMAIN_ALIASES, DOTLESS_DOMAINS, SUBADDRESS_SEPARATORS
+from .validator import EMAIL_PATTERN
+
+
+def canonicalize(email: str) -> str:
+    """
+    The canonical mailbox of ``email``. Addresses that are not syntactically
+    valid, or have a quoted local part, are returned as given (stripped).
+    """
+    address = email.strip()
+    if address.startswith('"') or not EMAIL_PATTERN.match(address):
+        return address
+
+    local_part, domain = address.rsplit("@", 1)
+    local_part = local_part.lower()
+    domain = domain.lower()
+    domain = DOMAIN_ALIASES.get(domain, domain)
+
+    separator = SUBADDRESS_SEPARATORS.get(domain)
+    if separator is not None:
+        # "+news@gmail.com" has no mailbox before the tag; leave it alone
+        local_part = local_part.split(separator, 1)[0] or local_part
+    if domain in DOTLESS_DOMAINS:
+        local_part = local_part.replace(".", "")
+    return f"{local_part}@{domain}"
@@ -0,0 +1,129 @@
+DISPOSABLE_URL = "https://disposable.github.io/disposable-email-domains/domains_mx.json"
+
+# MX answers are cached for their DNS TTL, clamped to this range (seconds)
+MX_MIN_TTL = 60
+MX_MAX_TTL = 86400
+# How long to remember that a domain has no MX records
+MX_NEGATIVE_TTL = 300
+MX_CACHE_SIZE = 10000
+# Expired answers are served while being refreshed for this long, and for up
+# to MX_MAX_STALE seconds when the lookup is unavailable
+MX_STALE_WHILE_REVALIDATE = 60
+MX_MAX_STALE = 3600
+# Answers requested at least this often are refreshed in the background once
+# they are in the last tenth of their TTL
+MX_REFRESH_AHEAD_MIN_HITS = 3
+MX_REFRESH_AHEAD_FRACTION = 0.1
+MX_REFRESH_WORKERS = 4
+
+# DNS lookups (see resolver.py). Timeouts adapt per domain between the
+# minimum and the lifetime, the total time one lookup may take.
+DNS_INITIAL_TIMEOUT = 2.0
+DNS_MIN_TIMEOUT = 0.5
+DNS_LIFETIME = 5.0
+# Failed lookups in a row before a breaker opens, and how long it stays open
+# (doubling after every failed probe)
+DNS_BREAKER_FAILURES = 3
+DNS_BREAKER_COOLDOWN = 30
+DNS_BREAKER_MAX_COOLDOWN = 600
+DNS_TRACKED_DOMAINS = 10000
+
+# Most common mailbox providers, most popular first. Used to prefetch MX
+# records at startup and as the base of typo suggestions.
+POPULAR_DOMAINS = [
+    "gmail.com",
+    "yahoo.com",
+    "outlook.com",
+    "hotmail.com",
+    "icloud.com",
+    "aol.com",
+    "live.com",
+    "msn.com",
+    "protonmail.com",
+    "proton.me",
+    "yandex.com",
+    "mail.com",
+    "gmx.com",
+    "gmx.de",
+    "web.de",
+    "zoho.com",
+    "yahoo.co.id",
+    "ymail.com",
+    "me.com",
+    "mac.com",
+    "googlemail.com",
+    "hotmail.co.uk",
+    "yahoo.co.uk",
+    "outlook.co.id",
+    "mail.ru",
+    "qq.com",
+    "163.com",
+    "naver.com",
+    "fastmail.com",
+    "tutanota.com",
+    # Regional providers, so they are not mistaken for typos of the above
+    "gmx.net",
+    "gmx.at",
+    "mail.de",
+    "t-online.de",
+    "hotmail.de",
+    "outlook.de",
+    "yahoo.de",
+    "live.ca",
+    "live.co.uk",
+    "live.fr",
+    "hotmail.fr",
+    "yahoo.fr",
+    "orange.fr",
+    "free.fr",
+    "laposte.net",
+    "libero.it",
+    "hotmail.it",
+    "yandex.ru",
+    "bk.ru",
+    "list.ru",
+    "inbox.ru",
+    "126.com",
+    "sina.com",
+    "daum.net",
+    "hanmail.net",
+    "rocketmail.com",
+    "rediffmail.com",
+    "att.net",
+    "comcast.net",
+    "verizon.net",
+    "btinternet.com",
+    "seznam.cz",
+    "wp.pl",
+    "o2.pl",
+]
+
+# Provider rules for canonical mailboxes (see canonical.py).
+# Domains that deliver to the same mailboxes as another domain
+DOMAIN_ALIASES = {"googlemail.com": "gmail.com"}
+
+# Sub-address separators: "user+news@gmail.com" is delivered to "user@gmail.com"
+SUBADDRESS_SEPARATORS = {
+    "gmail.com": "+",
+    "outlook.com": "+",
+    "outlook.co.id": "+",
+    "hotmail.com": "+",
+    "hotmail.co.uk": "+",
+    "live.com": "+",
+    "msn.com": "+",
+    "icloud.com": "+",
+    "me.com": "+",
+    "mac.com": "+",
+    "protonmail.com": "+",
+    "proton.me": "+",
+    "fastmail.com": "+",
+    "yandex.com": "+",
+    # Yahoo's disposable addresses are "base-keyword@"
+    "yahoo.com": "-",
+    "yahoo.co.id": "-",
+    "yahoo.co.uk": "-",
+    "ymail.com": "-",
+}
+
+# Providers that ignore dots in the local part
+DOTLESS_DOMAINS = {"gmail.com"}
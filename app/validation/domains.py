@@ -0,0 +1,234 @@
+import json
+import threading
+import time
+from .backends import CacheBackend, MemoryBackend, TieredCache
+from .config import (
+    DISPOSABLE_URL,
+    MX_CACHE_SIZE,
+    MX_MAX_STALE,
+    MX_MAX_TTL,
+    MX_MIN_TTL,
+    MX_NEGATIVE_TTL,
+    MX_REFRESH_AHEAD_FRACTION,
+    MX_REFRESH_AHEAD_MIN_HITS,
+    MX_REFRESH_WORKERS,
+    MX_STALE_WHILE_REVALIDATE,
+)
+from .exceptions import MXLookupUnavailableError
+from .resolver import mx_resolver
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+# Network backends (requests, dnspython) are imported on first use so that
+# importing the validator stays cheap.
+
+# Set to hold disposable domains
+disposable_domains: Set[str] = set()
+disposable_domains_loaded: bool = False
+# Bumped on every successful load, so results derived from an older list can
+# be told apart
+disposable_domains_version: int = 0
+
+# "mx:<domain>" -> [has MX records, fetched at, fresh until]. Replaced with
+# a TieredCache by use_mx_cache() when answers are shared through Redis.
+mx_cache: CacheBackend = MemoryBackend(MX_CACHE_SIZE)
+mx_stale_while_revalidate: float = MX_STALE_WHILE_REVALIDATE
+mx_max_stale: float = MX_MAX_STALE
+
+# Requests per fresh answer, to find the ones worth refreshing ahead
+_mx_hits: Dict[str, int] = {}
+_refreshing: Set[str] = set()
+_refresh_lock = threading.Lock()
+_refresher = None
+
+
+def _fetch_json(url: str, timeout: float = 10):
+    """GET ``url`` as JSON, with requests when installed, else urllib."""
+    try:
+        import requests
+    except ImportError:
+        from urllib.request import urlopen
+
+        with urlopen(url, timeout=timeout) as response:
+            return json.load(response)
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def load_disposable_domains() -> None:
+    """Load disposable domains from an external source only once."""
+    global disposable_domains, disposable_domains_loaded, disposable_domains_version
+    if disposable_domains_loaded:
+        return
+
+    try:
+        disposable_domains = set(_fetch_json(DISPOSABLE_URL))
+        disposable_domains_loaded = True
+        disposable_domains_version += 1
+    except OSError as e:
+        # requests.RequestException and urllib.error.URLError are both OSErrors
+        print(f"Error fetching disposable domains: {e}")
+    except ValueError as e:
+        print(f"Error parsing disposable domains JSON: {e}")
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        disposable_domains_loaded = False
+
+
+def is_disposable(domain: str) -> bool:
+    """Check if the domain is disposable by looking it up in the loaded set."""
+    if not disposable_domains_loaded:
+        load_disposable_domains()
+    return domain.lower() in disposable_domains
+
+
+def refresh_disposable_domains() -> None:
+    """Force refresh of the disposable domain list."""
+    global disposable_domains, disposable_domains_loaded
+    disposable_domains.clear()
+    disposable_domains_loaded = False
+    load_disposable_domains()
+
+
+class MXAnswer(NamedTuple):
+    valid: bool
+    # Served from an expired cache entry
+    stale: bool = False
+
+
+def set_mx_stale_policy(stale_while_revalidate: float, max_stale: float) -> None:
+    """
+    Serve expired MX answers for up to ``stale_while_revalidate`` seconds
+    while they are refreshed in the background, and for up to ``max_stale``
+    seconds when a fresh lookup is unavailable.
+    """
+    global mx_stale_while_revalidate, mx_max_stale
+    mx_stale_while_revalidate = stale_while_revalidate
+    mx_max_stale = max(max_stale, stale_while_revalidate)
+
+
+def _resolve_mx(domain: str) -> Tuple[bool, float]:
+    """
+    Look up MX records; return whether there are any and how long that holds.
+    Raises MXLookupUnavailableError if the lookup timed out or failed.
+    """
+    import dns.resolver
+
+    try:
+        mx_records = mx_resolver.resolve(domain, "MX")
+        ttl = min(max(mx_records.rrset.ttl, MX_MIN_TTL), MX_MAX_TTL)
+        return bool(mx_records), ttl
+    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+        return False, MX_NEGATIVE_TTL
+
+
+def use_mx_cache(cache: CacheBackend) -> None:
+    """Replace the MX answer cache, e.g. with one shared between hosts."""
+    global mx_cache
+    mx_cache = cache
+
+
+def _mx_key(domain: str) -> str:
+    return f"mx:{domain.lower()}"
+
+
+def _store_mx_answer(domain: str) -> bool:
+    valid, ttl = _resolve_mx(domain)
+    now = time.time()
+    # Kept past its TTL so it can still be served stale
+    mx_cache.set(_mx_key(domain), [valid, now, now + ttl], ttl + mx_max_stale)
+    _mx_hits.pop(_mx_key(domain), None)
+    return valid
+
+
+def _refresh_mx_answer(domain: str) -> None:
+    try:
+        _store_mx_answer(domain)
+    except Exception:
+        # Keep serving the cached answer; the next request tries again
+        pass
+    finally:
+        _refreshing.discard(_mx_key(domain))
+
+
+def _refresh_in_background(domain: str) -> None:
+    global _refresher
+    key = _mx_key(domain)
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresher is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _refresher = ThreadPoolExecutor(
+                max_workers=MX_REFRESH_WORKERS, thread_name_prefix="mx-refresh"
+            )
+    _refresher.submit(_refresh_mx_answer, domain)
+
+
+def lookup_mx(domain: str) -> MXAnswer:
+    """
+    Whether ``domain`` has MX records, from the cache when possible.
+
+    Answers about to expire that keep being asked for are refreshed ahead
+    of time. Expired answers are served while they are refreshed, and
+    served for longer if the refresh is unavailable. Raises
+    MXLookupUnavailableError if there is no answer to fall back on.
+    """
+    key = _mx_key(domain)
+    entry = mx_cache.get(key)
+    if entry is None:
+        return MXAnswer(_store_mx_answer(domain))
+
+    valid, fetched_at, fresh_until = entry[0]
+    now = time.time()
+    if now < fresh_until:
+        if len(_mx_hits) >= MX_CACHE_SIZE:
+            _mx_hits.clear()
+        hits = _mx_hits[key] = _mx_hits.get(key, 0) + 1
+        near_expiry = (
+            fresh_until - now < (fresh_until - fetched_at) * MX_REFRESH_AHEAD_FRACTION
+        )
+        if near_expiry and hits >= MX_REFRESH_AHEAD_MIN_HITS:
+            _refresh_in_background(domain)
+        return MXAnswer(valid)
+
+    if now - fresh_until < mx_stale_while_revalidate:
+        _refresh_in_background(domain)
+        return MXAnswer(valid, stale=True)
+    try:
+        return MXAnswer(_store_mx_answer(domain))
+    except MXLookupUnavailableError:
+        # The cache only keeps entries up to mx_max_stale past their TTL
+        return MXAnswer(valid, stale=True)
+
+
+def cached_mx_valid(domain: str) -> Optional[bool]:
+    """
+    The MX answer for ``domain`` cached in this process, fresh or stale.
+    Never resolves and never asks a shared cache, so it is safe to call on
+    an event loop.
+    """
+    cache = mx_cache.local if isinstance(mx_cache, TieredCache) else mx_cache
+    entry = cache.get(_mx_key(domain))
+    return None if entry is None else entry[0][0]
+
+
+def is_domain_valid(domain: str) -> bool:
+    """Check if the domain has valid MX records. Answers are cached for their TTL."""
+    return lookup_mx(domain).valid
+
+
+def prefetch_mx_answers(domains: Iterable[str]) -> None:
+    """Load cached answers for ``domains`` in one round trip before a batch."""
+    mx_cache.get_many({_mx_key(domain) for domain in domains})
+
+
+def mx_ttl(domain: str) -> Optional[float]:
+    """Seconds the cached MX answer for ``domain`` stays fresh, or None if there is none."""
+    entry = mx_cache.get(_mx_key(domain))
+    if entry is None:
+        return None
+    return max(entry[0][2] - time.time(), 0.0)
@@ -0,0 +1,14 @@
+class EmailFormatError(Exception):
+    """Raised when the email format is invalid."""
+
+
+class DisposableEmailError(Exception):
+    """Raised when the email domain is disposable."""
+
+
+class EmailMXRecordError(Exception):
+    """Raised when the email domain has no valid MX records."""
+
+
+class MXLookupUnavailableError(EmailMXRecordError):
+    """Raised when MX records could not be looked up (timeout or server failure)."""
@@ -0,0 +1,329 @@
+"""
+MX lookups with adaptive timeouts and circuit breakers.
+
+A few domains have authoritative servers that never answer. With fixed
+timeouts every address on such a domain costs the full resolver lifetime,
+which adds up to minutes in a bulk request. Instead:
+
+- Latency is tracked per domain and per configured nameserver, as a
+  smoothed mean and deviation (the way TCP sets retransmission timeouts).
+  A domain's timeout follows its own history and backs off after timeouts.
+  Nameservers are tried fastest first.
+- Each domain and each nameserver has a circuit breaker. After
+  ``failure_threshold`` failed lookups in a row it opens, and lookups fail
+  immediately with ``MXLookupUnavailableError``. Once the cooldown has
+  passed, a single probe is let through (half-open): success closes the
+  breaker, failure opens it again for twice as long.
+
+NXDOMAIN and empty answers are answers, not failures, and so are names
+that cannot exist ("a..com"). Timeouts count against the domain, and
+against the nameserver only once per domain until it answers again: one
+dead domain cannot trip a nameserver, timeouts on several domains and
+network errors can. ``dnspython`` is imported on the first lookup.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import (
+    DNS_BREAKER_COOLDOWN,
+    DNS_BREAKER_FAILURES,
+    DNS_BREAKER_MAX_COOLDOWN,
+    DNS_INITIAL_TIMEOUT,
+    DNS_LIFETIME,
+    DNS_MIN_TIMEOUT,
+    DNS_TRACKED_DOMAINS,
+)
+from .exceptions import MXLookupUnavailableError
+
+
+class LatencyTracker:
+    """Smoothed latency and deviation, and the timeout derived from them."""
+
+    def __init__(self, initial_timeout: float, min_timeout: float, max_timeout: float):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.latency: Optional[float] = None
+        self.deviation = 0.0
+        self.backoff = 1
+
+    def record(self, latency: float) -> None:
+        if self.latency is None:
+            self.latency = latency
+            self.deviation = latency / 2
+        else:
+            self.deviation = 0.75 * self.deviation + 0.25 * abs(self.latency - latency)
+            self.latency = 0.875 * self.latency + 0.125 * latency
+        self.backoff = 1
+
+    def record_timeout(self) -> None:
+        self.backoff = min(self.backoff * 2, 8)
+
+    def timeout(self) -> float:
+        if self.latency is None:
+            base = self.initial_timeout
+        else:
+            base = self.latency + 4 * self.deviation
+        return min(max(base * self.backoff, self.min_timeout), self.max_timeout)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float, max_cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def allow(self, now: float) -> bool:
+        """Whether a lookup may go ahead. In half-open state, only one at a time."""
+        if self.state == self.OPEN:
+            if now < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self._probing = False
+
+    def release(self) -> None:
+        """Give up a half-open probe without a verdict, so another can be made."""
+        self._probing = False
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open(now)
+        elif self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = self.OPEN
+        self.open_until = now + self.cooldown
+        self._probing = False
+
+    def get_stats(self, now: float) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"state": self.state, "failures": self.failures}
+        if self.state == self.OPEN:
+            stats["retry_in"] = round(max(self.open_until - now, 0.0), 1)
+        return stats
+
+
+class _Health:
+    """Latency and breaker of one domain or nameserver."""
+
+    def __init__(self):
+        self.latency = LatencyTracker(
+            DNS_INITIAL_TIMEOUT, DNS_MIN_TIMEOUT, DNS_LIFETIME
+        )
+        self.breaker = CircuitBreaker(
+            DNS_BREAKER_FAILURES, DNS_BREAKER_COOLDOWN, DNS_BREAKER_MAX_COOLDOWN
+        )
+        # Nameservers only: domains that timed out since the last answer
+        self.timed_out: Set[str] = set()
+
+
+class AdaptiveResolver:
+    """
+    Resolves through the system's nameservers (or ``nameservers``), one at
+    a time, within ``lifetime`` seconds per lookup.
+    """
+
+    def __init__(
+        self,
+        nameservers: Optional[List[str]] = None,
+        lifetime: float = DNS_LIFETIME,
+        max_domains: int = DNS_TRACKED_DOMAINS,
+    ):
+        self.lifetime = lifetime
+        self.max_domains = max_domains
+        self._nameservers = nameservers
+        self._servers: Dict[str, _Health] = {}
+        self._domains: "OrderedDict[str, _Health]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "timeouts": 0, "failures": 0, "short_circuited": 0}
+
+    def _servers_by_speed(self) -> List[Tuple[str, _Health]]:
+        if self._nameservers is None:
+            import dns.resolver
+
+            self._nameservers = list(dns.resolver.get_default_resolver().nameservers)
+        for nameserver in self._nameservers:
+            self._servers.setdefault(nameserver, _Health())
+        servers = [(ns, self._servers[ns]) for ns in self._nameservers]
+        return sorted(servers, key=lambda item: item[1].latency.timeout())
+
+    def _domain(self, domain: str) -> _Health:
+        health = self._domains.get(domain)
+        if health is None:
+            health = self._domains[domain] = _Health()
+            while len(self._domains) > self.max_domains:
+                self._domains.popitem(last=False)
+        self._domains.move_to_end(domain)
+        return health
+
+    def _query(self, domain: str, rdtype: str, nameserver: str, timeout: float):
+        import dns.resolver
+
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [nameserver]
+        resolver.timeout = resolver.lifetime = timeout
+        return resolver.resolve(domain, rdtype)
+
+    def resolve(self, domain: str, rdtype: str = "MX"):
+        """
+        Like ``dns.resolver.resolve``. Raises NXDOMAIN and NoAnswer as it
+        does, NXDOMAIN for names that are not valid DNS names, and
+        MXLookupUnavailableError for timeouts, server failures and open
+        breakers.
+        """
+        import dns.exception
+        import dns.name
+        import dns.resolver
+
+        domain = domain.lower()
+        try:
+            dns.name.from_text(domain)
+        except dns.exception.DNSException as e:
+            # Empty or over-long labels: no nameserver is asked, no breaker moves
+            raise dns.resolver.NXDOMAIN() from e
+        now = time.monotonic()
+        with self._lock:
+            self.stats["lookups"] += 1
+            health = self._domain(domain)
+            if not health.breaker.allow(now):
+                self.stats["short_circuited"] += 1
+                raise MXLookupUnavailableError(
+                    "MX lookup for this domain keeps failing; try again later."
+                )
+            servers = self._servers_by_speed()
+
+        deadline = now + self.lifetime
+        attempted = False
+        last_error: Optional[Exception] = None
+        for nameserver, server in servers:
+            started = time.monotonic()
+            timeout = min(health.latency.timeout(), deadline - started)
+            if timeout <= 0:
+                break
+            with self._lock:
+                if not server.breaker.allow(started):
+                    continue
+            attempted = True
+            try:
+                answer = self._query(domain, rdtype, nameserver, timeout)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                self._succeeded(health, server, time.monotonic() - started)
+                raise
+            except dns.exception.Timeout as e:
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                    health.latency.record_timeout()
+                    if domain not in server.timed_out:
+                        # A different domain each time points at the nameserver
+                        server.timed_out.add(domain)
+                        server.latency.record_timeout()
+                        server.breaker.record_failure(time.monotonic())
+                    else:
+                        server.breaker.release()
+                last_error = e
+                continue
+            except dns.resolver.NoNameservers as e:
+                # The nameserver answered (SERVFAIL or REFUSED); the domain is broken
+                with self._lock:
+                    server.latency.record(time.monotonic() - started)
+                    server.breaker.record_success()
+                    server.timed_out.clear()
+                last_error = e
+                break
+            except OSError as e:
+                # The network, not the domain: try the next nameserver
+                with self._lock:
+                    server.breaker.record_failure(time.monotonic())
+                last_error = e
+                continue
+            except Exception as e:
+                # About the query, not the nameserver; counts against the domain
+                with self._lock:
+                    server.breaker.release()
+                last_error = e
+                break
+            self._succeeded(health, server, time.monotonic() - started)
+            return answer
+
+        with self._lock:
+            if not attempted:
+                # Not the domain's fault; leave its breaker as it was
+                health.breaker.release()
+                self.stats["short_circuited"] += 1
+                raise MXLookupUnavailableError("No DNS server is reachable right now.")
+            self.stats["failures"] += 1
+            health.breaker.record_failure(time.monotonic())
+        raise MXLookupUnavailableError(
+            "MX lookup is temporarily unavailable."
+        ) from last_error
+
+    def _succeeded(self, health: _Health, server: _Health, latency: float) -> None:
+        with self._lock:
+            health.latency.record(latency)
+            health.breaker.record_success()
+            server.latency.record(latency)
+            server.breaker.record_success()
+            server.timed_out.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            nameservers = {
+                ns: {
+                    "latency_ms": _ms(server.latency.latency),
+                    "timeout_ms": _ms(server.latency.timeout()),
+                    **server.breaker.get_stats(now),
+                }
+                for ns, server in self._servers.items()
+            }
+            states = {
+                CircuitBreaker.CLOSED: 0,
+                CircuitBreaker.OPEN: 0,
+                CircuitBreaker.HALF_OPEN: 0,
+            }
+            failing = {}
+            for domain, health in self._domains.items():
+                states[health.breaker.state] += 1
+                if health.breaker.state != CircuitBreaker.CLOSED and len(failing) < 50:
+                    failing[domain] = {
+                        "timeout_ms": _ms(health.latency.timeout()),
+                        **health.breaker.get_stats(now),
+                    }
+            return {
+                **self.stats,
+                "nameservers": nameservers,
+                "domain_breakers": states,
+                "failing_domains": failing,
+            }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+mx_resolver = AdaptiveResolver()
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class EmailResult:
+    """Outcome of validating one address.
+
+    Mirrors the fields of the API's ``EmailResponse`` schema, and is
+    serialized directly with orjson on the bulk endpoint.
+    """
+
+    email: str
+    is_valid: bool
+    message: str = None
+    # The address with its domain corrected, if it looks mistyped
+    suggestion: Optional[str] = None
+    # Set on bulk results when duplicates are flagged
+    canonical: Optional[str] = None
+    duplicate: Optional[bool] = None
+    # The MX check used an expired cached answer because a fresh one was
+    # being fetched or could not be
+    stale: bool = False
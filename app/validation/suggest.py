@@ -0,0 +1,136 @@
+"""
+Typo suggestions for mistyped domains ("gmial.com" -> "gmail.com").
+
+Uses a SymSpell-style deletion index: every known domain is stored under
+each string obtainable by deleting up to ``max_distance`` characters, and a
+lookup generates the deletions of the input and checks the few candidates it
+finds with the optimal string alignment distance (edits plus adjacent
+transpositions). A lookup touches a few dozen dict keys and costs
+microseconds, so it can run on every row of a bulk request.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained from ``word`` by deleting up to ``max_distance`` characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:i] + candidate[i + 1 :]
+            for candidate in frontier
+            for i in range(len(candidate))
+        }
+        results |= frontier
+    return results
+
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or ``max_distance + 1`` if larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Typos leave most of the domain intact; only compare the part that differs
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start : len(a) - end], b[start : len(b) - end]
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        # A transposition can reach back one row, so both rows must be out of range
+        if min(current) > max_distance and min(previous) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class DomainIndex:
+    """
+    Deletion index over known-good domains. Domains given earlier rank
+    higher when two candidates are equally close. Answers are memoized until
+    the next ``build``, since bulk requests repeat the same domains.
+    """
+
+    def __init__(
+        self,
+        domains: Iterable[str] = (),
+        max_distance: int = 2,
+        cache_size: int = 10000,
+    ):
+        self.max_distance = max_distance
+        self.cache_size = cache_size
+        self.build(domains)
+
+    def build(self, domains: Iterable[str]) -> None:
+        """Replace the index contents. Lookups see either the old or new index."""
+        rank: Dict[str, int] = {}
+        for domain in domains:
+            rank.setdefault(domain.strip().lower(), len(rank))
+        deletes: Dict[str, List[str]] = {}
+        for domain in rank:
+            for key in _deletes(domain, self.max_distance):
+                deletes.setdefault(key, []).append(domain)
+        lengths = {len(domain) for domain in rank}
+        index = {key: tuple(values) for key, values in deletes.items()}
+        self._state = (rank, index, lengths, {})
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def __contains__(self, domain: str) -> bool:
+        return domain.lower() in self._state[0]
+
+    def suggest(self, domain: str) -> Optional[str]:
+        """The closest known domain, or None if ``domain`` is known or nothing is close."""
+        domain = domain.strip().lower()
+        rank, index, lengths, cache = self._state
+        if not domain or domain in rank:
+            return None
+        if domain in cache:
+            return cache[domain]
+
+        # Short domains get fewer edits, or "aol.co" would match half the list
+        max_distance = 1 if len(domain) < 7 else self.max_distance
+        best = None
+        if any(abs(len(domain) - length) <= max_distance for length in lengths):
+            best_key = (max_distance + 1, 0)
+            seen: Set[str] = set()
+            # Keys with the position of their last deletion; deleting only at or
+            # after it produces each combination of deletions once
+            frontier = [(domain, 0)]
+            for level in range(max_distance + 1):
+                if level:
+                    # Most typos are one edit away, so widen the search only if needed
+                    frontier = [
+                        (key[:i] + key[i + 1 :], i)
+                        for key, start in frontier
+                        for i in range(start, len(key))
+                    ]
+                for key, _ in frontier:
+                    for candidate in index.get(key, ()):
+                        if candidate in seen:
+                            continue
+                        seen.add(candidate)
+                        distance = osa_distance(domain, candidate, max_distance)
+                        if (distance, rank[candidate]) < best_key:
+                            best, best_key = candidate, (distance, rank[candidate])
+                # Anything not seen yet is more than ``level`` edits away
+                if best_key[0] <= level:
+                    break
+
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[domain] = best
+        return best
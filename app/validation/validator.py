@@ -0,0 +1,169 @@
+import re
+import unicodedata
+from typing import Optional, Union
+from functools import lru_cache
+from .config import POPULAR_DOMAINS
+from .domains import cached_mx_valid, is_disposable, lookup_mx
+from .exceptions import EmailFormatError, DisposableEmailError, EmailMXRecordError
+from .result import EmailResult
+from .suggest import DomainIndex
+
+# Compiled once at import rather than looked up in re's cache per address
+EMAIL_SPLIT_PATTERN = re.compile(r'(?:\"?([^@"]+)\"?\s)?<(.+)>|(.+)')
+EMAIL_PATTERN = re.compile(
+    r"^(?:(?:\"[^\"]*\")|(?:[a-zA-Z0-9._%+-]+))@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
+)
+
+DEFAULT_OPTIONS = {
+    "allow_smtputf8": False,
+    "allow_empty_local": False,
+    "allow_quoted_local": False,
+    "allow_domain_literal": False,
+    "allow_display_name": False,
+    "check_deliverability": True,
+    "test_environment": False,
+    "globally_deliverable": True,
+    "timeout": 10,
+}
+
+# Known-good domains for typo suggestions; filled on first use
+domain_index = DomainIndex()
+
+
+class EmailValidator:
+    DISPOSABLE_CACHE = {}
+    MX_CACHE = {}
+
+    def __init__(self, email: Union[str, bytes], **options):
+        if isinstance(email, bytes):
+            try:
+                email = email.decode("ascii")
+            except ValueError as e:
+                raise EmailFormatError("The email address is not valid ASCII.") from e
+
+        self.email = email
+        self.options = {**DEFAULT_OPTIONS, **options}
+        # Set when an expired MX answer had to be used
+        self.stale = False
+        self.local_part, self.domain, self.display_name, self.is_quoted_local = (
+            self._split_email()
+        )
+
+    def _split_email(self):
+        """Split the email into display name, local part, and domain, handling quoted local parts."""
+        match = EMAIL_SPLIT_PATTERN.match(self.email)
+        if not match:
+            raise EmailFormatError("Invalid email format.")
+
+        display_name, addr_spec, fallback = match.groups()
+        local_part, domain = (addr_spec or fallback).split("@", 1)
+
+        # Check for quoted local part if allowed
+        is_quoted_local = local_part.startswith('"') and local_part.endswith('"')
+        if is_quoted_local:
+            if self.options["allow_quoted_local"] is not True:
+                raise EmailFormatError("Quoted local part is not allowed.")
+            local_part = local_part.strip('"')
+
+        local_part = unicodedata.normalize("NFC", local_part)
+        domain = unicodedata.normalize("NFC", domain)
+
+        return local_part, domain, display_name, is_quoted_local
+
+    def _check_email_pattern(self, email: str) -> bool:
+        """Check if the email matches the correct pattern using regex."""
+        valid = bool(EMAIL_PATTERN.match(email.strip()))
+        return valid
+
+    @lru_cache(maxsize=1024)
+    def _is_disposable_cached(self, domain: str) -> bool:
+        """Cached check for disposable domains."""
+        if domain in self.DISPOSABLE_CACHE:
+            return self.DISPOSABLE_CACHE[domain]
+        result = is_disposable(domain)
+        self.DISPOSABLE_CACHE[domain] = result
+        return result
+
+    def _is_mx_valid_cached(self, domain: str) -> bool:
+        """MX record validity; ``lookup_mx`` caches it for the record's TTL."""
+        answer = lookup_mx(domain)
+        self.stale = self.stale or answer.stale
+        self.MX_CACHE[domain] = answer.valid
+        return answer.valid
+
+    def validate(self) -> EmailResult:
+        """Main validation entry point."""
+
+        # Disposable email check
+        if self._is_disposable_cached(self.domain):
+            raise DisposableEmailError("Disposable email addresses are not allowed.")
+
+        if not self._check_email_pattern(self.email):
+            raise EmailFormatError("Invalid email format.")
+
+        # Domain literal check
+        if self.domain.startswith("[") and self.domain.endswith("]"):
+            if not self.options["allow_domain_literal"]:
+                raise EmailFormatError("Domain literal is not allowed.")
+
+        # MX Record check if deliverability checks are enabled
+        if (
+            self.options["check_deliverability"]
+            and not self.options["test_environment"]
+        ):
+            if not self._is_mx_valid_cached(self.domain):
+                raise EmailMXRecordError("Domain has no valid MX records.")
+
+        # Return validated email
+        return EmailResult(
+            self.email, True, "Email is valid.", self.suggest(), stale=self.stale
+        )
+
+    def suggest(self) -> Optional[str]:
+        """
+        The address with its domain corrected if it looks like a typo of a
+        known one. Domains known to have MX records are real, not typos.
+        """
+        if not len(domain_index):
+            refresh_domain_index()
+        domain = domain_index.suggest(self.domain)
+        if domain is None or cached_mx_valid(self.domain):
+            return None
+        return f"{self.local_part}@{domain}"
+
+    def check_syntax(self) -> EmailResult:
+        """Check the address format only, without any lookups."""
+        valid = self._check_email_pattern(self.email)
+        message = "Email format is valid." if valid else "Invalid email format."
+        return EmailResult(self.email, valid, message, self.suggest())
+
+    def check_disposable(self) -> EmailResult:
+        """Check if the email domain is disposable."""
+        disposable = self._is_disposable_cached(self.domain)
+        message = "Domain is disposable." if disposable else "Domain is not disposable."
+        return EmailResult(self.email, not disposable, message)
+
+    def check_mx_record(self) -> EmailResult:
+        """Check if the email domain has valid MX records."""
+        has_mx = self._is_mx_valid_cached(self.domain)
+        message = "Valid MX records found." if has_mx else "No valid MX records."
+        return EmailResult(self.email, has_mx, message)
+
+    def is_globally_deliverable(self) -> bool:
+        """Determine if the domain is globally deliverable, considering restricted TLDs."""
+        if not self.options.get("globally_deliverable", False):
+            return True
+
+        restricted_tlds = {"local", "example", "invalid", "test"}
+        tld = self.domain.split(".")[-1].lower()
+        if tld in restricted_tlds:
+            return False
+
+        result = self._is_mx_valid_cached(self.domain)
+        return result
+
+
+def refresh_domain_index() -> None:
+    """Rebuild the suggestion index from the popular domains and domains seen with MX records."""
+    seen = [domain for domain, valid in list(EmailValidator.MX_CACHE.items()) if valid]
+    domain_index.build([*POPULAR_DOMAINS, *seen])
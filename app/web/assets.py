@@ -0,0 +1,143 @@
+"""
+Fingerprinted static assets.
+
+``python -m app.web.assets`` copies every file under ``static/`` to
+``static/dist/`` with a content hash in its name, writes gzip and, when the
+``brotli`` package is installed, brotli variants of compressible files, and
+records the mapping in ``static/dist/manifest.json``. Templates resolve
+asset URLs through ``asset_url`` and fall back to the original file when no
+build has been made.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import stat
+from typing import Dict, Optional
+import anyio
+from fastapi.staticfiles import StaticFiles
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+from app.core.compression import accepted_encodings
+
+STATIC_DIR = "static"
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".json", ".svg", ".ico", ".webmanifest"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_manifest: Optional[Dict[str, str]] = None
+
+
+def _fingerprinted_name(path: str, digest: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:12]}{ext}"
+
+
+def _write_compressed(path: str, data: bytes) -> None:
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + ".br", "wb") as f:
+        f.write(brotli.compress(data, quality=11))
+
+
+def build_assets(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """Build the fingerprinted copies and their compressed variants."""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+
+            hashed = _fingerprinted_name(relative, hashlib.sha256(data).hexdigest())
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+                _write_compressed(target, data)
+
+            manifest[relative] = f"{DIST_DIR}/{hashed}"
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    global _manifest
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)) as f:
+            _manifest = json.load(f)
+    except FileNotFoundError:
+        _manifest = {}
+    return _manifest
+
+
+@pass_context
+def asset_url(context, path: str) -> str:
+    """Jinja helper returning the fingerprinted URL of a static asset."""
+    manifest = _manifest if _manifest is not None else load_manifest()
+    path = path.lstrip("/")
+    return str(context["request"].url_for("static", path=manifest.get(path, path)))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Serves ``.br``/``.gz`` variants of fingerprinted assets when the client
+    accepts them, and marks fingerprinted assets as immutable.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not path.startswith(os.path.join(DIST_DIR, "")):
+            return await super().get_response(path, scope)
+
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(
+        self, path: str, scope: Scope
+    ) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if accepted.get(encoding, 0) <= 0:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + suffix
+            )
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = (
+                    mimetypes.guess_type(path)[0] or "application/octet-stream"
+                )
+                return response
+        return None
+
+
+if __name__ == "__main__":
+    built = build_assets()
+    print(f"Built {len(built)} fingerprinted assets in {STATIC_DIR}/{DIST_DIR}")
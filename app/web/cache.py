@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request, status
+from fastapi.responses import HTMLResponse, Response
+from fastapi.templating import Jinja2Templates
+
+HEADER_TEMPLATE = "components/header.html"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check ``If-None-Match`` against ``etag``."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    # Weak comparison, so tags weakened by response compression match
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+class PageCache:
+    """
+    Rendered-page cache for the marketing and documentation pages.
+
+    The anonymous variant of a page is cached whole. The logged-in variant is
+    cached as the page around its header, and only the header is rendered per
+    request. Everything is dropped when a template or ``faq.json`` changes.
+    """
+
+    def __init__(
+        self,
+        templates: Jinja2Templates,
+        template_dir: str = "templates",
+        faq_path: str = "faq.json",
+        max_entries: int = 64,
+        check_interval: float = 2.0,
+    ):
+        self.templates = templates
+        self.template_dir = template_dir
+        self.faq_path = faq_path
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.faq_items = []
+        self.version = 0.0
+        self.last_check = 0.0
+        self.entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._refresh()
+
+    def _source_version(self) -> float:
+        mtimes = [os.path.getmtime(self.faq_path)]
+        for root, _, files in os.walk(self.template_dir):
+            mtimes.extend(os.path.getmtime(os.path.join(root, name)) for name in files)
+        return max(mtimes)
+
+    def _refresh(self) -> None:
+        with open(self.faq_path, "r") as f:
+            self.faq_items = json.load(f)
+        self.version = self._source_version()
+        self.entries.clear()
+
+    def _check_sources(self) -> None:
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        if self._source_version() != self.version:
+            self._refresh()
+
+    def _context(self, request: Request, current_user) -> Dict[str, Any]:
+        return {
+            "request": request,
+            "hero_title": "Validate emails with confidence ✨",
+            "hero_description": "Simple, reliable email validation API for developers.",
+            "faq_items": self.faq_items,
+            "current_year": datetime.now().year,
+            "current_user": current_user,
+        }
+
+    def _render(self, template_name: str, request: Request, current_user) -> str:
+        template = self.templates.get_template(template_name)
+        return template.render(self._context(request, current_user))
+
+    def _cached(self, key: Tuple, build):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = build()
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(key)
+        return entry
+
+    def _logged_in_shell(
+        self, template_name: str, request: Request
+    ) -> Optional[Tuple[str, str]]:
+        """Render the page once for a placeholder user and cut out its header."""
+        placeholder = SimpleNamespace(username="pagecacheheaderplaceholder")
+        page = self._render(template_name, request, placeholder)
+        header = self._render(HEADER_TEMPLATE, request, placeholder)
+        before, found, after = page.partition(header)
+        if not found:
+            return None
+        return before, after
+
+    def render(
+        self, template_name: str, request: Request, current_user=None
+    ) -> Response:
+        self._check_sources()
+        key = (template_name, str(request.base_url), datetime.now().year)
+
+        if current_user is None:
+            body = self._cached(
+                key + ("anonymous",),
+                lambda: self._render(template_name, request, None),
+            )
+            etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+            cache_control = "public, max-age=60"
+        else:
+            shell = self._cached(
+                key + ("user",), lambda: self._logged_in_shell(template_name, request)
+            )
+            if shell is None:
+                body = self._render(template_name, request, current_user)
+            else:
+                header = self._render(HEADER_TEMPLATE, request, current_user)
+                body = shell[0] + header + shell[1]
+            etag = f'W/"{hashlib.sha1(body.encode()).hexdigest()}"'
+            cache_control = "private, no-cache"
+
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(self.version, usegmt=True),
+            "Cache-Control": cache_control,
+            "Vary": "Cookie",
+        }
+        if self._not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return HTMLResponse(content=body, headers=headers)
+
+    def _not_modified(self, request: Request, etag: str) -> bool:
+        if request.headers.get("if-none-match") is not None:
+            return etag_matches(request, etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(self.version) <= since
@@ -1,23 +1,40 @@
+import asyncio
+
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (
+    HTMLResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.core.utils import get_usage_stats
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import Session, undefer
+from app.config import settings
+from app.core.events import usage_notifier
+from app.core.utils import (
+    get_usage_stats,
+    get_usage_stats_async,
+    get_usage_version,
+    get_usage_version_async,
+)
+from app.database import SessionLocal, get_db, get_request_async_db
 from app.auth.dependencies import get_current_user, get_current_user_optional
 from app.api.models import APIKey
-from datetime import datetime
 from app.auth.models import User, UserStatus
-import json
 
-from app.web.utils import get_dashboard_stats
+from app.web.assets import asset_url
+from app.web.cache import PageCache, etag_matches
+from app.web.utils import get_dashboard_stats, get_dashboard_stats_async
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
 
-# Load FAQ data
-with open("faq.json", "r") as f:
-    FAQ_ITEMS = json.load(f)
+page_cache = PageCache(templates)
 
 
 @router.get("/robots.txt", response_class=PlainTextResponse)
@@ -29,33 +46,13 @@ def robots():
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request, db: Session = Depends(get_db)):
     current_user = await get_current_user_optional(request, db)
-    return templates.TemplateResponse(
-        "pages/home.html",
-        {
-            "request": request,
-            "hero_title": "Validate emails with confidence ✨",
-            "hero_description": "Simple, reliable email validation API for developers.",
-            "faq_items": FAQ_ITEMS,
-            "current_year": datetime.now().year,
-            "current_user": current_user,
-        },
-    )
+    return page_cache.render("pages/home.html", request, current_user)
 
 
 @router.get("/docs-temp", response_class=HTMLResponse)
 async def docs(request: Request, db: Session = Depends(get_db)):
     current_user = await get_current_user_optional(request, db)
-    return templates.TemplateResponse(
-        "pages/documentation.html",
-        {
-            "request": request,
-            "hero_title": "Validate emails with confidence ✨",
-            "hero_description": "Simple, reliable email validation API for developers.",
-            "faq_items": FAQ_ITEMS,
-            "current_year": datetime.now().year,
-            "current_user": current_user,
-        },
-    )
+    return page_cache.render("pages/documentation.html", request, current_user)
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
@@ -64,15 +61,19 @@ async def dashboard(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Get active API keys
-    api_keys = (
-        db.query(APIKey)
-        .filter(APIKey.user_id == current_user.id, APIKey.is_active == True)
-        .all()
+    # Active API keys and usage statistics
+    api_keys_statement = (
+        select(APIKey)
+        .options(undefer(APIKey.total_usage))
+        .where(APIKey.user_id == current_user.id, APIKey.is_active == True)
     )
-
-    # Get usage statistics
-    usage_stats = get_dashboard_stats(current_user, db)
+    if settings.DB_ASYNC:
+        async_db = get_request_async_db(request)
+        api_keys = (await async_db.scalars(api_keys_statement)).all()
+        usage_stats = await get_dashboard_stats_async(current_user, async_db)
+    else:
+        api_keys = db.scalars(api_keys_statement).all()
+        usage_stats = get_dashboard_stats(current_user, db)
     usage_stats["dates"] = [date.isoformat() for date in usage_stats["dates"]]
     return templates.TemplateResponse(
         "pages/dashboard.html",
@@ -88,17 +89,7 @@ async def dashboard(
 @router.get("/docs-api", response_class=HTMLResponse)
 async def docs_api(request: Request, db: Session = Depends(get_db)):
     current_user = await get_current_user_optional(request, db)
-    return templates.TemplateResponse(
-        "pages/docs-api.html",
-        {
-            "request": request,
-            "hero_title": "Validate emails with confidence ✨",
-            "hero_description": "Simple, reliable email validation API for developers.",
-            "faq_items": FAQ_ITEMS,
-            "current_year": datetime.now().year,
-            "current_user": current_user,
-        },
-    )
+    return page_cache.render("pages/docs-api.html", request, current_user)
 
 
 # @router.post("/upgrade-to-donatur" name='upgrade_to_donatur')
@@ -117,21 +108,112 @@ async def docs_api(request: Request, db: Session = Depends(get_db)):
 #         raise HTTPException(status_code=500, detail="Failed to upgrade user status")
 
 
-@router.get("/usage-stats")
-async def get_user_usage_stats(
-    request: Request,
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    stats = get_usage_stats(current_user.id, db)
-    monthly_limit = None if current_user.status == UserStatus.DONATUR else 100
+def _usage_etag(user_id: int, version) -> str:
+    latest_usage, user_status = version
+    return f'W/"usage-{user_id}-{latest_usage or 0}-{UserStatus(user_status).value}"'
+
+
+def _usage_payload(user_status, stats):
+    monthly_limit = None if user_status == UserStatus.DONATUR else 100
 
     return {
-        "status": current_user.status,
+        "status": user_status,
         "monthly_limit": monthly_limit,
         "current_usage": stats["total_calls"],
         "remaining_calls": None
         if monthly_limit is None
         else max(0, monthly_limit - stats["total_calls"]),
-        "is_limited": current_user.status == UserStatus.FREE,
+        "is_limited": user_status == UserStatus.FREE,
     }
+
+
+@router.get("/usage-stats")
+async def get_user_usage_stats(
+    request: Request,
+    response: Response,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # The version is a single index lookup; stats are only aggregated when it moved
+    if settings.DB_ASYNC:
+        async_db = get_request_async_db(request)
+        version = await get_usage_version_async(current_user.id, async_db)
+    else:
+        version = get_usage_version(current_user.id, db)
+    if version[1] is None:
+        # The account was deleted after the session cookie was issued
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+
+    etag = _usage_etag(current_user.id, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Cookie"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.DB_ASYNC:
+        stats = await get_usage_stats_async(current_user.id, async_db)
+    else:
+        stats = get_usage_stats(current_user.id, db)
+    response.headers.update(headers)
+    return _usage_payload(version[1], stats)
+
+
+def _read_usage_update(user_id: int, last_version):
+    """Return the current version and, if it moved, the dashboard payload."""
+    db = SessionLocal()
+    try:
+        version = get_usage_version(user_id, db)
+        if version == last_version or version[1] is None:
+            return version, None
+        stats = get_usage_stats(user_id, db)
+        payload = _usage_payload(version[1], stats)
+        payload.update(
+            success_rate=stats["success_rate"],
+            dates=stats["dates"],
+            calls=stats["calls"],
+        )
+        return version, payload
+    finally:
+        db.close()
+
+
+async def _usage_events(user_id: int):
+    last_version = None
+    with usage_notifier.listen(user_id) as changed:
+        while True:
+            changed.clear()
+            # The request-scoped session is gone once streaming starts
+            version, payload = await run_in_threadpool(
+                _read_usage_update, user_id, last_version
+            )
+            if version[1] is None:
+                # The account was deleted; end the stream
+                return
+            if payload is None:
+                yield b": keep-alive\n\n"
+            else:
+                last_version = version
+                yield (
+                    f"id: {version[0] or 0}\nevent: usage\ndata: ".encode()
+                    + orjson.dumps(payload)
+                    + b"\n\n"
+                )
+            # Woken by calls logged in this worker; the timeout picks up the rest
+            try:
+                await asyncio.wait_for(
+                    changed.wait(), timeout=settings.USAGE_STREAM_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+@router.get("/usage-stats/stream")
+async def stream_user_usage_stats(current_user=Depends(get_current_user)):
+    """Server-sent events carrying the usage stats whenever they change."""
+    return StreamingResponse(
+        _usage_events(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
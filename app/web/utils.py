@@ -3,9 +3,13 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from app.api.models import APIKey, APIUsage
+from collections import defaultdict
+from app.api.models import APIKey, APIUsageDaily
 from app.auth.models import User, UserStatus
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -15,19 +19,20 @@ def get_dashboard_stats(user: User, db: Session) -> Dict[str, Any]:
     """Calculate dashboard statistics for a user."""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
+    first_day_of_month = end_date.date().replace(day=1)
 
-    # Get daily API calls for the last 30 days
-    daily_usage = (
+    # One pass over the daily rollups answers every breakdown below
+    rollups = (
         db.query(
-            func.date(APIUsage.timestamp).label("date"),
-            func.count(APIUsage.id).label("count"),
-        )
-        .filter(
-            APIUsage.user_id == user.id,
-            APIUsage.timestamp >= start_date,
-            APIUsage.timestamp <= end_date,
+            APIUsageDaily.day,
+            APIUsageDaily.endpoint,
+            APIKey.name,
+            func.sum(APIUsageDaily.calls),
+            func.sum(APIUsageDaily.successes),
         )
-        .group_by(func.date(APIUsage.timestamp))
+        .join(APIKey, APIKey.id == APIUsageDaily.api_key_id)
+        .filter(APIUsageDaily.user_id == user.id)
+        .group_by(APIUsageDaily.day, APIUsageDaily.endpoint, APIKey.name)
         .all()
     )
 
@@ -35,51 +40,27 @@ def get_dashboard_stats(user: User, db: Session) -> Dict[str, Any]:
     dates = [(start_date + timedelta(days=x)).date() for x in range(31)]
     usage_dict = {date: 0 for date in dates}
 
-    # Fill in actual usage
-    for result in daily_usage:
-        date, count = result
+    total_calls = 0
+    successful_calls = 0
+    current_month_usage = 0
+    endpoint_usage = defaultdict(int)
+    key_usage = defaultdict(int)
+    for date, endpoint, key_name, calls, successes in rollups:
+        calls, successes = int(calls), int(successes)
         if isinstance(date, str):
             date = datetime.fromisoformat(date).date()
-        usage_dict[date] = count
 
-    # Calculate total calls and success rate
-    total_calls = db.query(APIUsage).filter(APIUsage.user_id == user.id).count()
-
-    successful_calls = (
-        db.query(APIUsage)
-        .filter(APIUsage.user_id == user.id, APIUsage.is_success == True)
-        .count()
-    )
+        total_calls += calls
+        successful_calls += successes
+        endpoint_usage[endpoint] += calls
+        key_usage[key_name] += calls
+        if date in usage_dict:
+            usage_dict[date] += calls
+        if date >= first_day_of_month:
+            current_month_usage += calls
 
     success_rate = (successful_calls / total_calls * 100) if total_calls > 0 else 0
 
-    # Get current month's usage for limit checking
-    first_day_of_month = datetime.now().replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
-    current_month_usage = (
-        db.query(APIUsage)
-        .filter(APIUsage.user_id == user.id, APIUsage.timestamp >= first_day_of_month)
-        .count()
-    )
-
-    # Get endpoint usage breakdown
-    endpoint_usage = (
-        db.query(APIUsage.endpoint, func.count(APIUsage.id).label("count"))
-        .filter(APIUsage.user_id == user.id)
-        .group_by(APIUsage.endpoint)
-        .all()
-    )
-
-    # Get usage by API key
-    key_usage = (
-        db.query(APIKey.name, func.count(APIUsage.id).label("count"))
-        .join(APIUsage, APIUsage.api_key_id == APIKey.id)
-        .filter(APIKey.user_id == user.id)
-        .group_by(APIKey.name)
-        .all()
-    )
-
     return {
         "total_calls": total_calls,
         "success_rate": round(success_rate, 2),
@@ -93,3 +74,9 @@ def get_dashboard_stats(user: User, db: Session) -> Dict[str, Any]:
         "endpoint_breakdown": dict(endpoint_usage),
         "key_usage": dict(key_usage),
     }
+
+
+async def get_dashboard_stats_async(
+    user: User, db: "AsyncSession"
+) -> Dict[str, Any]:
+    return await db.run_sync(lambda session: get_dashboard_stats(user, session))
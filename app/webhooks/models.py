@@ -0,0 +1,39 @@
+import enum
+from sqlalchemy import Column, DateTime, Integer, String, Text, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class WebhookEventStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    PROCESSING = "PROCESSING"
+    # The donor's account exists; their welcome email still has to be queued
+    WELCOME_PENDING = "WELCOME_PENDING"
+    PROCESSED = "PROCESSED"
+    FAILED = "FAILED"
+
+
+class WebhookEvent(Base):
+    """A received webhook delivery, applied later by the webhook processor."""
+
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        UniqueConstraint(
+            "provider", "idempotency_key", name="uq_webhook_events_idempotency"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    provider = Column(String(50), nullable=False)
+    # The provider's event id when present, else a hash of the raw body
+    idempotency_key = Column(String(128), nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(
+        String(20), nullable=False, default=WebhookEventStatus.PENDING, index=True
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    available_at = Column(DateTime, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,438 @@
+"""
+Background processing of stored webhook events.
+
+``/webhooks/socialbuzz`` only stores the delivery and acknowledges it; the
+upgrade is applied here. Events are processed one at a time in the order
+they were received. Each is claimed with a conditional update first, so
+several workers can run the processor without applying an event twice.
+Failed events are retried with backoff up to ``WEBHOOK_MAX_ATTEMPTS`` times
+and then left as ``FAILED`` for inspection. A new donor's account is
+committed before their welcome email, with its generated password, is
+queued; until it is, the event stays ``WELCOME_PENDING``. If the mail queue
+is full, later attempts send a link to set a password instead of another
+random one, so no email ever carries a password that does not work.
+
+The webhook route wakes the processor of its own worker; events received by
+other workers are picked up within ``WEBHOOK_POLL_INTERVAL`` seconds.
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.auth.models import PasswordReset, User, UserStatus
+from app.auth.token_cache import invalidate_user_cache
+from app.auth.utils import (
+    generate_password_reset_token,
+    generate_random_password,
+    get_password_hash_async,
+)
+from app.config import settings
+from app.core.mailer import MailQueueFullError, enqueue_email
+from app.core.metrics import register_metrics
+from app.database import SessionLocal
+from .models import WebhookEvent, WebhookEventStatus
+
+webhook_stats: Dict[str, Any] = {
+    "received": 0,
+    "duplicates": 0,
+    "processed": 0,
+    "retried": 0,
+    "failed": 0,
+    "last_error": None,
+}
+
+_task: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def event_idempotency_key(payload: Dict[str, Any], body: bytes) -> str:
+    """The provider's event id when it sends one, else a hash of the raw body."""
+    event_id = payload.get("id")
+    if event_id not in (None, ""):
+        return f"id:{event_id}"[:128]
+    return "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+def record_event(
+    db: Session, provider: str, payload: Dict[str, Any], body: bytes
+) -> bool:
+    """Store a delivery. Returns False if it was already received."""
+    event = WebhookEvent(
+        provider=provider,
+        idempotency_key=event_idempotency_key(payload, body),
+        payload=body.decode("utf-8"),
+        status=WebhookEventStatus.PENDING,
+    )
+    try:
+        with db.begin_nested():
+            db.add(event)
+    except IntegrityError:
+        webhook_stats["duplicates"] += 1
+        return False
+    db.commit()
+    webhook_stats["received"] += 1
+    return True
+
+
+def notify_webhook_processor() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def welcome_email_body(email: str, password: str) -> str:
+    return f"""Dear {email},
+
+We are pleased to inform you that your account has been successfully created. Below are your login credentials:
+
+- **Email:** {email}
+- **Password:** {password}
+
+For your security, we recommend that you log in as soon as possible and change your password to something more personal and secure.
+
+If you have any questions or need assistance, please feel free to me at fathin@youremailvalidator.com.
+
+Welcome aboard, and thank you for joining the Donatur Plan!
+
+Best regards,
+Fathin
+Maker of Your Email Validator
+"""
+
+
+def welcome_link_email_body(email: str, reset_url: str) -> str:
+    return f"""Dear {email},
+
+We are pleased to inform you that your account has been successfully created. Please choose your password here:
+
+{reset_url}
+
+This link will expire in 30 minutes. After that, you can request a new one with "Forgot password" on the login page.
+
+Welcome aboard, and thank you for joining the Donatur Plan!
+
+Best regards,
+Fathin
+Maker of Your Email Validator
+"""
+
+
+def _apply_upgrade(
+    db: Session, payload: Dict[str, Any], hashed_password: Optional[str]
+) -> User:
+    """Upgrade the donating user, or create them with ``hashed_password``."""
+    donatur_email = payload["email_supporter"]
+    user = db.query(User).filter(User.email == donatur_email).first()
+    if user is not None:
+        user.status = UserStatus.DONATUR
+        return user
+
+    if hashed_password is None:
+        # The account was removed after the event was claimed
+        raise LookupError(f"No password was prepared for {donatur_email}")
+    user = User(
+        username=payload.get("supporter") or donatur_email,
+        email=donatur_email,
+        hashed_password=hashed_password,
+        status=UserStatus.DONATUR,
+    )
+    db.add(user)
+    return user
+
+
+def _pending_event_ids(limit: int) -> List[int]:
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        # Release claims of workers that died while processing
+        db.execute(
+            update(WebhookEvent)
+            .where(
+                WebhookEvent.status == WebhookEventStatus.PROCESSING,
+                WebhookEvent.claimed_at
+                < now - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT),
+            )
+            .values(status=WebhookEventStatus.PENDING)
+        )
+        db.commit()
+        return db.scalars(
+            select(WebhookEvent.id)
+            .where(
+                WebhookEvent.status.in_(
+                    [WebhookEventStatus.PENDING, WebhookEventStatus.WELCOME_PENDING]
+                ),
+                (WebhookEvent.available_at == None)
+                | (WebhookEvent.available_at <= now),
+            )
+            .order_by(WebhookEvent.id)
+            .limit(limit)
+        ).all()
+    finally:
+        db.close()
+
+
+def _record_failure(
+    db: Session,
+    event_id: int,
+    error: Exception,
+    retry_status: WebhookEventStatus = WebhookEventStatus.PENDING,
+) -> None:
+    """Schedule a retry of the event, or mark it failed after the last attempt."""
+    db.rollback()
+    event = db.get(WebhookEvent, event_id)
+    event.attempts += 1
+    event.error = str(error) or type(error).__name__
+    webhook_stats["last_error"] = event.error
+    if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+        event.status = WebhookEventStatus.FAILED
+        webhook_stats["failed"] += 1
+    else:
+        event.status = retry_status
+        event.available_at = datetime.now() + timedelta(
+            seconds=settings.WEBHOOK_POLL_INTERVAL * 2**event.attempts
+        )
+        webhook_stats["retried"] += 1
+    db.commit()
+
+
+def _claim_event(event_id: int) -> Optional[Tuple[Dict[str, Any], bool, bool]]:
+    """
+    Claim one event. Returns its payload, whether the donor already has an
+    account and whether only their welcome email is left to queue, or None
+    if another worker claimed it or it is malformed.
+    """
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        claimed = db.execute(
+            update(WebhookEvent)
+            .where(
+                WebhookEvent.id == event_id,
+                WebhookEvent.status == WebhookEventStatus.PENDING,
+            )
+            .values(status=WebhookEventStatus.PROCESSING, claimed_at=now)
+        ).rowcount
+        welcome_only = False
+        if not claimed:
+            # The status stays; pushing available_at back is the claim, and
+            # lets another worker take over if this one dies
+            claimed = db.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.id == event_id,
+                    WebhookEvent.status == WebhookEventStatus.WELCOME_PENDING,
+                    (WebhookEvent.available_at == None)
+                    | (WebhookEvent.available_at <= now),
+                )
+                .values(
+                    claimed_at=now,
+                    available_at=now
+                    + timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT),
+                )
+            ).rowcount
+            welcome_only = bool(claimed)
+        db.commit()
+        if not claimed:
+            return None
+
+        event = db.get(WebhookEvent, event_id)
+        try:
+            payload = json.loads(event.payload)
+            donatur_email = payload["email_supporter"]
+        except Exception as e:
+            _record_failure(db, event_id, e)
+            return None
+        exists = db.query(User.id).filter(User.email == donatur_email).first()
+        return payload, exists is not None, welcome_only
+    finally:
+        db.close()
+
+
+def _fail_event(
+    event_id: int,
+    error: Exception,
+    retry_status: WebhookEventStatus = WebhookEventStatus.PENDING,
+) -> None:
+    db = SessionLocal()
+    try:
+        _record_failure(db, event_id, error, retry_status)
+    finally:
+        db.close()
+
+
+def _complete_event(
+    event_id: int, payload: Dict[str, Any], hashed_password: Optional[str]
+) -> Optional[Tuple[int, bool]]:
+    """
+    Apply a claimed event. Returns the user id and whether the account was
+    created, or None if it failed. An event that created an account is left
+    ``WELCOME_PENDING``, claimed for ``WEBHOOK_CLAIM_TIMEOUT`` seconds.
+    """
+    db = SessionLocal()
+    try:
+        event = db.get(WebhookEvent, event_id)
+        try:
+            user = _apply_upgrade(db, payload, hashed_password)
+            created = user.id is None
+            if created:
+                event.status = WebhookEventStatus.WELCOME_PENDING
+                event.available_at = datetime.now() + timedelta(
+                    seconds=settings.WEBHOOK_CLAIM_TIMEOUT
+                )
+            else:
+                event.status = WebhookEventStatus.PROCESSED
+                event.processed_at = datetime.now()
+            event.error = None
+            db.commit()
+        except Exception as e:
+            _record_failure(db, event_id, e)
+            return None
+        if not created:
+            webhook_stats["processed"] += 1
+        return user.id, created
+    finally:
+        db.close()
+
+
+def _finish_event(event_id: int) -> None:
+    """Mark an event whose welcome email was queued as processed."""
+    db = SessionLocal()
+    try:
+        event = db.get(WebhookEvent, event_id)
+        event.status = WebhookEventStatus.PROCESSED
+        event.processed_at = datetime.now()
+        event.error = None
+        db.commit()
+        webhook_stats["processed"] += 1
+    finally:
+        db.close()
+
+
+def _create_reset_url(email: str) -> Optional[str]:
+    """A link for the donor to choose a password, or None if they have no account."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            return None
+        token = generate_password_reset_token()
+        db.add(
+            PasswordReset(
+                user_id=user.id,
+                token=token,
+                expires_at=datetime.now(timezone.utc) + timedelta(minutes=30),
+            )
+        )
+        db.commit()
+        return f"{settings.SITE_URL.rstrip('/')}/reset-password/{token}"
+    finally:
+        db.close()
+
+
+async def _queue_welcome(event_id: int, email: str, body: str) -> None:
+    try:
+        enqueue_email(
+            to_email=email,
+            subject="Welcome to Donatur Plan",
+            body=body,
+            sensitive=True,
+        )
+    except MailQueueFullError as e:
+        await run_in_threadpool(
+            _fail_event, event_id, e, WebhookEventStatus.WELCOME_PENDING
+        )
+        return
+    await run_in_threadpool(_finish_event, event_id)
+
+
+async def _process_event(event_id: int) -> None:
+    """
+    Claim and apply one event. A new donor's account is committed first and
+    their password emailed after; if that email cannot be queued, retries
+    email a link to set a password instead.
+    """
+    claimed = await run_in_threadpool(_claim_event, event_id)
+    if claimed is None:
+        return
+    payload, exists, welcome_only = claimed
+    email = payload["email_supporter"]
+
+    if welcome_only:
+        reset_url = await run_in_threadpool(_create_reset_url, email)
+        if reset_url is None:
+            # The account was removed in the meantime; nothing left to send
+            await run_in_threadpool(_finish_event, event_id)
+            return
+        await _queue_welcome(event_id, email, welcome_link_email_body(email, reset_url))
+        return
+
+    password = hashed_password = None
+    if not exists:
+        password = generate_random_password()
+        try:
+            hashed_password = await get_password_hash_async(password)
+        except HTTPException as e:
+            # Hashing is shedding load; nothing was written yet
+            await run_in_threadpool(_fail_event, event_id, e)
+            return
+
+    completed = await run_in_threadpool(
+        _complete_event, event_id, payload, hashed_password
+    )
+    if completed is None:
+        return
+    user_id, created = completed
+    invalidate_user_cache(user_id)
+    if created:
+        await _queue_welcome(event_id, email, welcome_email_body(email, password))
+
+
+async def process_pending_events() -> int:
+    """Apply the next batch of pending events in order; return how many were due."""
+    event_ids = await run_in_threadpool(_pending_event_ids, settings.WEBHOOK_BATCH_SIZE)
+    for event_id in event_ids:
+        await _process_event(event_id)
+    return len(event_ids)
+
+
+async def _processor_loop() -> None:
+    while True:
+        _wakeup.clear()
+        try:
+            while await process_pending_events():
+                pass
+        except Exception as e:
+            webhook_stats["last_error"] = str(e)
+            print(f"Webhook processing failed: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.WEBHOOK_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_webhook_processor() -> None:
+    global _task, _wakeup
+    if _task is None:
+        _wakeup = asyncio.Event()
+        _task = asyncio.create_task(_processor_loop())
+
+
+async def stop_webhook_processor() -> None:
+    global _task, _wakeup
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+        _wakeup = None
+
+
+register_metrics("webhooks", lambda: dict(webhook_stats))
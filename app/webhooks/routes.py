@@ -3,10 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi.responses import JSONResponse
 from app.database import get_db
-from app.auth.models import User, UserStatus
-from app.core.utils import send_email
-from app.auth.utils import generate_random_password, get_password_hash
+from .processor import notify_webhook_processor, record_event
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -21,7 +20,9 @@ WEBHOOK_TOKEN = os.environ.get("WEBHOOK_TOKEN")
 async def socialbuzz(request: Request, db: Session = Depends(get_db)):
     """
     Webhook endpoint to upgrade a user to Donatur status.
-    Validates the webhook token and updates the user's status.
+    Validates the webhook token, stores the event and acknowledges it right
+    away; the upgrade itself is applied by the webhook processor. Repeated
+    deliveries of the same event are acknowledged without being stored again.
     """
     # Validate webhook token
     token = request.headers.get("sb-webhook-token")
@@ -31,79 +32,37 @@ async def socialbuzz(request: Request, db: Session = Depends(get_db)):
             detail="Invalid webhook token",
         )
 
+    body = await request.body()
     try:
-        # Parse the payload
-        payload = await request.json()
-        donatur_name = payload.get("supporter")
-        donatur_email = payload.get("email_supporter")
-
-        if not donatur_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email not provided",
-            )
-
-        # Find the user by email
-        user = db.query(User).filter(User.email == donatur_email).first()
-        if not user:
-            password = generate_random_password()
-            hash_password = get_password_hash(password)
-            user = User(
-                username=donatur_name,
-                email=donatur_email,
-                password=hash_password,
-                status=UserStatus.DONATUR,
-            )
-            db.add(user)
-            db.commit()
-
-            # Send email with user credentials
-            try:
-                send_email(
-                    to_email=user.email,
-                    subject="Welcome to Donatur Plan",
-                    body=f"""Dear {user.email},
-
-We are pleased to inform you that your account has been successfully created. Below are your login credentials:
-
-- **Email:** {user.email}
-- **Password:** {password}
-
-For your security, we recommend that you log in as soon as possible and change your password to something more personal and secure.
-
-If you have any questions or need assistance, please feel free to me at fathin@youremailvalidator.com.
-
-Welcome aboard, and thank you for joining the Donatur Plan!
-
-Best regards, 
-Fathin
-Maker of Your Email Validator
-""",
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to send email: {str(e)}",
-                )
-
-        # Update the user's status to Donatur
-        user.status = UserStatus.DONATUR
-        db.commit()
+        payload = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid payload: {str(e)}",
+        )
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={
-                "message": f"User {user.email} successfully upgraded to Donatur",
-            },
+    if not isinstance(payload, dict) or not payload.get("email_supporter"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email not provided",
         )
+
+    try:
+        created = record_event(db, "socialbuzz", payload, body)
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unexpected error: {str(e)}",
-        )
+
+    if created:
+        notify_webhook_processor()
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "message": "Event received" if created else "Event already received",
+            "duplicate": not created,
+        },
+    )
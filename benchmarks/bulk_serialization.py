@@ -0,0 +1,104 @@
+"""
+Compare the serialization share of a bulk validation response.
+
+    python -m benchmarks.bulk_serialization --emails 1000 --repeat 20
+
+The "pydantic" path mirrors the previous endpoint: one ``EmailResponse`` per
+address, re-validated against ``List[EmailResponse]`` and encoded with
+``jsonable_encoder`` plus ``JSONResponse``. The "orjson" path is the current
+one: ``EmailResult`` records rendered by ``ORJSONResponse``. Validation runs
+with ``test_environment`` so no DNS lookups are made.
+"""
+
+import argparse
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.services.schemas import EmailResponse
+from app.validation import EmailFormatError, EmailResult, EmailValidator
+from app.validation import domains as validation_domains
+
+response_adapter = TypeAdapter(List[EmailResponse])
+
+
+def make_emails(count: int) -> List[str]:
+    """Mix of valid and malformed addresses across a handful of domains."""
+    domains = ["example.com", "mail.example.org", "test.example.net", "bad_domain"]
+    return [f"user{i}@{domains[i % len(domains)]}" for i in range(count)]
+
+
+def validate(emails: List[str], record):
+    """Run the bulk validation loop, building one ``record`` per address."""
+    results = []
+    for email in emails:
+        validator = EmailValidator(email, test_environment=True)
+        try:
+            validator.validate()
+            results.append(
+                record(email=email, is_valid=True, message="Email is valid.")
+            )
+        except EmailFormatError:
+            results.append(
+                record(email=email, is_valid=False, message="Invalid email format.")
+            )
+    return results
+
+
+def serialize_pydantic(results: List[EmailResponse]) -> bytes:
+    validated = response_adapter.validate_python(results, from_attributes=True)
+    content = jsonable_encoder(response_adapter.dump_python(validated, mode="json"))
+    return JSONResponse(content).body
+
+
+def serialize_orjson(results: List[EmailResult]) -> bytes:
+    return ORJSONResponse(results).body
+
+
+def run(emails: List[str], record, serialize, repeat: int):
+    """Return (validation seconds, serialization seconds) per request."""
+    validation = serialization = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = validate(emails, record)
+        middle = time.perf_counter()
+        serialize(results)
+        validation += middle - start
+        serialization += time.perf_counter() - middle
+    return validation / repeat, serialization / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Skip the network fetch of the disposable list; it is not what we measure.
+    validation_domains.disposable_domains_loaded = True
+    emails = make_emails(args.emails)
+
+    before = serialize_pydantic(validate(emails, EmailResponse))
+    after = serialize_orjson(validate(emails, EmailResult))
+    assert response_adapter.validate_json(before) == response_adapter.validate_json(
+        after
+    ), "payloads differ"
+
+    for name, record, serialize in (
+        ("pydantic", EmailResponse, serialize_pydantic),
+        ("orjson", EmailResult, serialize_orjson),
+    ):
+        validation, serialization = run(emails, record, serialize, args.repeat)
+        total = validation + serialization
+        print(
+            f"{name:<9} emails={args.emails:<5} total={total * 1000:8.2f} ms  "
+            f"serialize={serialization * 1000:7.2f} ms  "
+            f"share={serialization / total:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
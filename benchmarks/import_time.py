@@ -0,0 +1,91 @@
+"""
+Check the cold-import cost of the core validation package.
+
+    python -m benchmarks.import_time --budget-ms 50
+
+Each module is imported in a fresh interpreter; the time of an empty
+interpreter is subtracted. Exits with status 1 if ``app.validation`` goes
+over the budget or pulls in any of the heavy dependencies it must only load
+lazily.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+CORE_MODULE = "app.validation"
+
+# Must not be imported by the core package at import time
+HEAVY_MODULES = [
+    "requests",
+    "dns",
+    "redis",
+    "pydantic",
+    "fastapi",
+    "sqlalchemy",
+    "mysql",
+    "passlib",
+    "jose",
+    "app.config",
+    "app.database",
+]
+
+
+def interpreter_ms(code: str, repeat: int) -> float:
+    """Median wall time in milliseconds of running ``code`` in a new interpreter."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def loaded_heavy_modules(module: str):
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return output.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument(
+        "--compare",
+        nargs="*",
+        default=["app.services.email_validator"],
+        help="other modules to report, without a budget",
+    )
+    args = parser.parse_args()
+
+    baseline = interpreter_ms("pass", args.repeat)
+    print(f"{'interpreter':<32} {baseline:8.1f} ms")
+
+    failed = False
+    for module in [CORE_MODULE, *args.compare]:
+        cost = interpreter_ms(f"import {module}", args.repeat) - baseline
+        line = f"{module:<32} {cost:8.1f} ms"
+        if module == CORE_MODULE:
+            heavy = loaded_heavy_modules(module)
+            over_budget = cost > args.budget_ms
+            line += f"  budget {args.budget_ms:.0f} ms"
+            if over_budget:
+                line += "  OVER BUDGET"
+            if heavy:
+                line += f"  imports {', '.join(heavy)}"
+            failed = over_budget or bool(heavy)
+        print(line)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Measure bcrypt throughput for a range of work factors.
+
+    python -m benchmarks.password_hashing --rounds 10 11 12 13 --workers 2
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+def run(rounds: int, workers: int, operations: int) -> float:
+    """Return hashes per second for the given work factor and pool size."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(context.hash, ["benchmark-password"] * operations))
+    return operations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--operations", type=int, default=20)
+    args = parser.parse_args()
+
+    for rounds in args.rounds:
+        throughput = run(rounds, args.workers, args.operations)
+        print(
+            f"rounds={rounds:<3} workers={args.workers:<3} "
+            f"{throughput:8.1f} hashes/s  {1000 / throughput * args.workers:8.1f} ms/hash"
+        )
+
+
+if __name__ == "__main__":
+    main()
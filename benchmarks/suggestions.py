@@ -0,0 +1,83 @@
+"""
+Measure the per-address cost of typo suggestions.
+
+    python -m benchmarks.suggestions --extra-domains 5000 --lookups 100000
+
+Builds a ``DomainIndex`` from the popular domains plus ``--extra-domains``
+synthetic ones (standing in for domains seen with MX records), then times
+lookups of known domains, one- and two-edit typos and unrelated domains.
+Lookups are timed with the result cache disabled and enabled.
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from app.validation import DomainIndex
+from app.validation.config import POPULAR_DOMAINS
+
+
+def make_typo(domain: str, edits: int, rng: random.Random) -> str:
+    """Apply ``edits`` random single-character edits to the name part of ``domain``."""
+    name, _, tld = domain.partition(".")
+    for _ in range(edits):
+        i = rng.randrange(len(name))
+        kind = rng.choice(["delete", "insert", "replace", "transpose"])
+        if kind == "delete" and len(name) > 1:
+            name = name[:i] + name[i + 1 :]
+        elif kind == "transpose" and i < len(name) - 1:
+            name = name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+        else:
+            letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            skip = 1 if kind == "replace" else 0
+            name = name[:i] + letter + name[i + skip :]
+    return f"{name}.{tld}"
+
+
+def time_lookups(index: DomainIndex, domains: List[str]) -> float:
+    """Mean microseconds per ``suggest`` call."""
+    start = time.perf_counter()
+    for domain in domains:
+        index.suggest(domain)
+    return (time.perf_counter() - start) / len(domains) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--extra-domains", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    extra = [f"company{i}.example.com" for i in range(args.extra_domains)]
+    domains = [*POPULAR_DOMAINS, *extra]
+
+    start = time.perf_counter()
+    index = DomainIndex(domains, cache_size=0)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"index of {len(index)} domains built in {build_ms:.1f} ms")
+
+    # Unique inputs so the cache-less numbers are not flattered by repeats
+    samples = {
+        "known": [rng.choice(POPULAR_DOMAINS) for _ in range(args.lookups)],
+        "one edit": [
+            make_typo(rng.choice(POPULAR_DOMAINS), 1, rng) for _ in range(args.lookups)
+        ],
+        "two edits": [
+            make_typo(rng.choice(POPULAR_DOMAINS), 2, rng) for _ in range(args.lookups)
+        ],
+        "unrelated": [f"corp{i}.org" for i in range(args.lookups)],
+    }
+
+    cached = DomainIndex(domains)
+    print(f"{'lookup':<12} {'no cache':>10} {'cached':>10}")
+    for name, inputs in samples.items():
+        uncached_us = time_lookups(index, inputs)
+        cached_us = time_lookups(cached, inputs)
+        print(f"{name:<12} {uncached_us:8.2f} us {cached_us:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
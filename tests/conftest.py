@@ -0,0 +1,58 @@
+import pytest
+
+from app.validation import MemoryBackend, backends, cache, domains, resolver
+from app.validation.validator import EmailValidator
+
+
+class Clock:
+    """Stands in for the ``time`` module; advanced by hand."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    for module in (backends, cache, domains, resolver):
+        monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def mx_answers(monkeypatch):
+    """
+    Domain -> (has MX records, TTL) or an exception to raise, served instead
+    of DNS. Resolved domains are appended to ``mx_answers.lookups``.
+    """
+
+    class Answers(dict):
+        lookups: list
+
+    answers = Answers()
+    answers.lookups = []
+
+    def resolve_mx(domain):
+        answers.lookups.append(domain)
+        answer = answers[domain]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(domains, "_resolve_mx", resolve_mx)
+    monkeypatch.setattr(domains, "mx_cache", MemoryBackend())
+    monkeypatch.setattr(domains, "_mx_hits", {})
+    monkeypatch.setattr(domains, "disposable_domains", {"mailinator.com"})
+    monkeypatch.setattr(domains, "disposable_domains_loaded", True)
+    monkeypatch.setattr(EmailValidator, "DISPOSABLE_CACHE", {})
+    monkeypatch.setattr(EmailValidator, "MX_CACHE", {})
+    return answers
@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.web.assets import PrecompressedStaticFiles, build_assets
+
+CSS = b"body { color: #333; }\n" * 100
+
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / "site.css").write_bytes(CSS)
+    manifest = build_assets(str(tmp_path))
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)))
+    return TestClient(app), "/static/" + manifest["site.css"]
+
+
+def encoding_for(static, accept_encoding):
+    client, url = static
+    response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.content == CSS
+    assert response.headers["Vary"] == "Accept-Encoding"
+    return response.headers.get("Content-Encoding")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("BR;Q=0.5", "br"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_variant_follows_accept_encoding(static, accept_encoding, expected):
+    assert encoding_for(static, accept_encoding) == expected
+
+
+def test_missing_brotli_variant_falls_back_to_gzip(static, tmp_path):
+    for variant in tmp_path.glob("dist/*.br"):
+        variant.unlink()
+
+    assert encoding_for(static, "br, gzip") == "gzip"
@@ -0,0 +1,225 @@
+import json
+
+import pytest
+
+from app.validation import (
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    TieredCache,
+    domains,
+)
+
+
+class FakeRedis:
+    """The part of the ``redis.Redis`` API that ``RedisBackend`` uses, in memory."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+        self.calls = []
+        self.error = None
+
+    def _check(self, call):
+        self.calls.append(call)
+        if self.error is not None:
+            raise self.error
+
+    def mget(self, keys):
+        self._check("mget")
+        now = self.clock.time()
+        return [
+            self.data[key][0] if key in self.data and self.data[key][1] > now else None
+            for key in keys
+        ]
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, data, px):
+        self.commands.append((key, data, px))
+
+    def execute(self):
+        self.client._check("execute")
+        for key, data, px in self.commands:
+            self.client.data[key] = (data, self.client.clock.time() + px / 1000)
+        return [True] * len(self.commands)
+
+
+@pytest.fixture
+def redis(clock):
+    return FakeRedis(clock)
+
+
+def test_a_backend_missing_a_method_cannot_be_created():
+    class ReadOnly(CacheBackend):
+        def get_many(self, keys):
+            return {}
+
+    with pytest.raises(TypeError, match="set_many"):
+        ReadOnly()
+
+
+def test_memory_backend_expiry(clock):
+    memory = MemoryBackend()
+    memory.set("a", 1, ttl=10)
+
+    clock.advance(9)
+    assert memory.get("a") == (1, clock.time() + 1)
+    clock.advance(1)
+    assert memory.get("a") is None
+
+
+def test_memory_backend_drops_least_recently_used(clock):
+    memory = MemoryBackend(max_entries=2)
+    memory.set("a", 1, ttl=10)
+    memory.set("b", 2, ttl=10)
+    memory.get("a")
+    memory.set("c", 3, ttl=10)
+
+    assert set(memory.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_set_many_is_one_pipelined_round_trip(clock, redis):
+    shared = RedisBackend(client=redis, prefix="t:")
+
+    shared.set_many({"a": [True], "b": [False]}, ttl=1.5)
+
+    assert redis.calls == ["execute"]
+    assert set(redis.data) == {"t:a", "t:b"}
+    data, expires_at = redis.data["t:a"]
+    assert json.loads(data) == [[True], clock.time() + 1.5]
+    assert expires_at == clock.time() + 1.5
+
+
+def test_get_many_is_one_mget(clock, redis):
+    shared = RedisBackend(client=redis, prefix="t:")
+    shared.set_many({"a": 1, "b": 2}, ttl=60)
+    redis.calls.clear()
+
+    found = shared.get_many(["a", "b", "missing"])
+
+    assert redis.calls == ["mget"]
+    assert found == {"a": (1, clock.time() + 60), "b": (2, clock.time() + 60)}
+    assert shared.stats["hits"] == 2 and shared.stats["misses"] == 1
+
+
+def test_foreign_values_are_misses(clock, redis):
+    shared = RedisBackend(client=redis, prefix="t:")
+    redis.data["t:a"] = (b"not json", clock.time() + 60)
+
+    assert shared.get_many(["a"]) == {}
+
+
+def test_errors_fail_open_and_skip_redis_for_retry_interval(clock, redis):
+    shared = RedisBackend(client=redis, retry_interval=5)
+    redis.error = ConnectionError("connection refused")
+
+    assert shared.get_many(["a"]) == {}
+    assert shared.stats["errors"] == 1
+    assert shared.stats["last_error"] == "connection refused"
+    assert shared.get_stats()["available"] is False
+
+    # Skipped without touching the client
+    redis.error = None
+    shared.get_many(["a"])
+    shared.set_many({"a": 1}, ttl=60)
+    assert redis.calls == ["mget"]
+
+    clock.advance(5)
+    shared.set_many({"a": 1}, ttl=60)
+    assert shared.get_many(["a"]) == {"a": (1, clock.time() + 60)}
+
+
+def test_write_errors_also_skip_redis(clock, redis):
+    shared = RedisBackend(client=redis, retry_interval=5)
+    redis.error = TimeoutError("timed out")
+
+    shared.set_many({"a": 1}, ttl=60)
+
+    assert shared.stats["errors"] == 1
+    assert shared.get_stats()["available"] is False
+
+
+def test_tiered_reads_fill_memory_with_the_shared_expiry(clock, redis):
+    shared = RedisBackend(client=redis)
+    shared.set_many({"a": 1}, ttl=60)
+    clock.advance(20)
+    tiered = TieredCache(MemoryBackend(), shared)
+    redis.calls.clear()
+
+    assert tiered.get("a") == (1, clock.time() + 40)
+    assert tiered.local.get("a") == (1, clock.time() + 40)
+
+    # Served from memory until it expires there and in Redis alike
+    clock.advance(39)
+    assert tiered.get("a") == (1, clock.time() + 1)
+    assert redis.calls == ["mget"]
+    clock.advance(1)
+    assert tiered.get("a") is None
+    assert tiered.local.get("a") is None
+
+
+def test_tiered_misses_share_one_mget(clock, redis):
+    shared = RedisBackend(client=redis)
+    tiered = TieredCache(MemoryBackend(), shared)
+    tiered.local.set("a", 1, ttl=60)
+    shared.set_many({"b": 2}, ttl=60)
+    redis.calls.clear()
+
+    found = tiered.get_many(["a", "b", "c"])
+
+    assert set(found) == {"a", "b"}
+    assert redis.calls == ["mget"]
+
+
+def test_tiered_writes_go_to_both(clock, redis):
+    tiered = TieredCache(MemoryBackend(), RedisBackend(client=redis))
+
+    tiered.set_many({"a": 1}, ttl=60)
+
+    assert tiered.local.get("a") == (1, clock.time() + 60)
+    assert tiered.shared.get("a") == (1, clock.time() + 60)
+
+
+def test_tiered_keeps_working_when_redis_is_down(clock, redis):
+    tiered = TieredCache(MemoryBackend(), RedisBackend(client=redis))
+    redis.error = ConnectionError("connection refused")
+
+    tiered.set_many({"a": 1}, ttl=60)
+
+    assert tiered.get("a") == (1, clock.time() + 60)
+
+
+def test_mx_answers_are_shared_between_workers(clock, redis, mx_answers, monkeypatch):
+    mx_answers["gmail.com"] = (True, 300)
+    workers = [TieredCache(MemoryBackend(), RedisBackend(client=redis)) for _ in "ab"]
+
+    monkeypatch.setattr(domains, "mx_cache", workers[0])
+    assert domains.lookup_mx("gmail.com").valid
+    monkeypatch.setattr(domains, "mx_cache", workers[1])
+    assert domains.lookup_mx("gmail.com").valid
+
+    assert mx_answers.lookups == ["gmail.com"]
+
+
+def test_cached_mx_valid_never_asks_redis(clock, redis, mx_answers, monkeypatch):
+    shared = RedisBackend(client=redis)
+    shared.set_many({"mx:gmx.net": [True, clock.time(), clock.time() + 300]}, ttl=300)
+    monkeypatch.setattr(domains, "mx_cache", TieredCache(MemoryBackend(), shared))
+    redis.calls.clear()
+
+    # Only in Redis: unknown here, and the event loop is not blocked on it
+    assert domains.cached_mx_valid("gmx.net") is None
+    assert redis.calls == []
+
+    assert domains.lookup_mx("gmx.net").valid
+    assert domains.cached_mx_valid("gmx.net") is True
+    assert redis.calls == ["mget"]
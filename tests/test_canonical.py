@@ -0,0 +1,33 @@
+import pytest
+
+from app.validation import canonicalize
+
+
+@pytest.mark.parametrize(
+    "email, expected",
+    [
+        ("John.Doe+news@GoogleMail.com", "johndoe@gmail.com"),
+        ("j.o.h.n@gmail.com", "john@gmail.com"),
+        ("jane+shop@outlook.com", "jane@outlook.com"),
+        # Outlook keeps dots
+        ("jane.doe@outlook.com", "jane.doe@outlook.com"),
+        ("Jane.Doe+x@Example.COM", "jane.doe+x@example.com"),
+        ("  jane@gmail.com \n", "jane@gmail.com"),
+    ],
+)
+def test_canonical_form(email, expected):
+    assert canonicalize(email) == expected
+
+
+def test_tag_without_mailbox_is_kept():
+    assert canonicalize("+news@gmail.com") == "+news@gmail.com"
+
+
+@pytest.mark.parametrize("email", ["not-an-email", '"John.Doe"@gmail.com', ""])
+def test_invalid_and_quoted_addresses_are_returned_as_given(email):
+    assert canonicalize(f" {email} ") == email
+
+
+def test_same_mailbox_same_canonical_form():
+    variants = ["johndoe@gmail.com", "John.Doe@gmail.com", "johndoe+a@googlemail.com"]
+    assert len({canonicalize(v) for v in variants}) == 1
@@ -0,0 +1,191 @@
+import dns.exception
+import dns.resolver
+import pytest
+
+from app.validation import MXLookupUnavailableError, domains
+from app.validation.resolver import AdaptiveResolver, CircuitBreaker
+
+ANSWER = object()
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker(failure_threshold=3, cooldown=30, max_cooldown=100)
+
+
+def test_breaker_opens_after_threshold(breaker):
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(0)
+
+    breaker.record_failure(0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(29.9)
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    breaker.record_success()
+    breaker.record_failure(0)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    for _ in range(3):
+        breaker.record_failure(0)
+
+    assert breaker.allow(30)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow(30)
+
+    breaker.release()
+    assert breaker.allow(31)
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(31) and breaker.allow(31)
+
+
+def test_failed_probe_doubles_the_cooldown(breaker):
+    for _ in range(3):
+        breaker.record_failure(0)
+
+    breaker.allow(30)
+    breaker.record_failure(30)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow(89.9)
+
+    breaker.allow(90)
+    breaker.record_failure(90)
+    # Capped at max_cooldown
+    assert breaker.open_until == 190
+
+    breaker.allow(190)
+    breaker.record_success()
+    assert breaker.cooldown == 30
+
+
+class Replies:
+    """Stands in for ``AdaptiveResolver._query``."""
+
+    def __init__(self):
+        self.by_server = {}
+        self.by_domain = {}
+        self.calls = []
+
+    def __call__(self, domain, rdtype, nameserver, timeout):
+        self.calls.append((domain, nameserver))
+        reply = self.by_domain.get(domain, self.by_server.get(nameserver, ANSWER))
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+@pytest.fixture
+def replies(clock):
+    return Replies()
+
+
+@pytest.fixture
+def mx_resolver(replies, monkeypatch):
+    resolver = AdaptiveResolver(nameservers=["ns1", "ns2"])
+    monkeypatch.setattr(resolver, "_query", replies)
+    return resolver
+
+
+def test_network_errors_open_the_nameserver_breakers(mx_resolver, replies):
+    replies.by_server = {ns: ConnectionRefusedError("refused") for ns in ("ns1", "ns2")}
+
+    for domain in ["a.example", "b.example", "c.example"]:
+        with pytest.raises(MXLookupUnavailableError):
+            mx_resolver.resolve(domain)
+    replies.calls.clear()
+
+    with pytest.raises(MXLookupUnavailableError, match="No DNS server"):
+        mx_resolver.resolve("gmail.com")
+    assert replies.calls == []
+    stats = mx_resolver.get_stats()
+    assert {ns["state"] for ns in stats["nameservers"].values()} == {"open"}
+    # Not the domain's fault
+    assert stats["domain_breakers"]["open"] == 0
+
+
+def test_invalid_names_are_nxdomain_and_move_no_breaker(mx_resolver, replies):
+    long_label = "x" * 64 + ".com"
+    for domain in ["a..com", long_label, "a..com", long_label]:
+        with pytest.raises(dns.resolver.NXDOMAIN):
+            mx_resolver.resolve(domain)
+
+    assert replies.calls == []
+    assert mx_resolver.resolve("gmail.com") is ANSWER
+    stats = mx_resolver.get_stats()
+    assert {ns["state"] for ns in stats["nameservers"].values()} == {"closed"}
+    assert stats["domain_breakers"]["open"] == 0
+
+
+def test_invalid_names_have_no_mx_records(mx_resolver, monkeypatch):
+    monkeypatch.setattr(domains, "mx_resolver", mx_resolver)
+
+    valid, _ = domains._resolve_mx("a..com")
+
+    assert not valid
+
+
+def test_failing_domain_short_circuits(mx_resolver, replies, clock):
+    replies.by_server = {ns: dns.exception.Timeout() for ns in ("ns1", "ns2")}
+
+    for _ in range(3):
+        with pytest.raises(MXLookupUnavailableError):
+            mx_resolver.resolve("dead.example")
+    replies.calls.clear()
+
+    with pytest.raises(MXLookupUnavailableError, match="keeps failing"):
+        mx_resolver.resolve("dead.example")
+    assert replies.calls == []
+    # A domain that never answered does not count against the nameservers
+    stats = mx_resolver.get_stats()
+    assert {ns["state"] for ns in stats["nameservers"].values()} == {"closed"}
+
+    # One probe after the cooldown; it succeeds and closes the breaker
+    clock.advance(30)
+    replies.by_server = {}
+    assert mx_resolver.resolve("dead.example") is ANSWER
+    assert mx_resolver.get_stats()["domain_breakers"]["open"] == 0
+
+
+@pytest.fixture
+def single_resolver(replies, monkeypatch):
+    # The usual deployment: one recursive resolver
+    resolver = AdaptiveResolver(nameservers=["ns1"])
+    monkeypatch.setattr(resolver, "_query", replies)
+    return resolver
+
+
+def test_one_timing_out_domain_never_blocks_others(single_resolver, replies):
+    assert single_resolver.resolve("broken.com") is ANSWER
+    replies.by_domain["broken.com"] = dns.exception.Timeout()
+
+    for _ in range(3):
+        with pytest.raises(MXLookupUnavailableError):
+            single_resolver.resolve("broken.com")
+
+    assert single_resolver.resolve("gmail.com") is ANSWER
+    stats = single_resolver.get_stats()
+    assert stats["nameservers"]["ns1"]["state"] == CircuitBreaker.CLOSED
+    assert stats["failing_domains"]["broken.com"]["state"] == CircuitBreaker.OPEN
+
+
+def test_timeouts_on_several_domains_trip_the_nameserver(single_resolver, replies):
+    replies.by_server["ns1"] = dns.exception.Timeout()
+
+    for domain in ["a.example", "b.example", "c.example"]:
+        with pytest.raises(MXLookupUnavailableError):
+            single_resolver.resolve(domain)
+
+    with pytest.raises(MXLookupUnavailableError, match="No DNS server"):
+        single_resolver.resolve("gmail.com")
+    stats = single_resolver.get_stats()
+    assert stats["nameservers"]["ns1"]["state"] == CircuitBreaker.OPEN
@@ -0,0 +1,90 @@
+from app.validation import MXLookupUnavailableError, ResultCache, domains
+
+
+def test_hit_needs_no_lookup(clock, mx_answers):
+    mx_answers["gmail.com"] = (True, 300)
+    results = ResultCache()
+
+    first = results.validate("jane@gmail.com")
+    second = results.validate("jane@gmail.com")
+
+    assert first.is_valid and second is first
+    assert mx_answers.lookups == ["gmail.com"]
+    assert results.stats["hits"] == 1
+
+
+def test_surrounding_whitespace_shares_the_entry(clock, mx_answers):
+    mx_answers["gmail.com"] = (True, 300)
+    results = ResultCache()
+
+    padded = results.validate(" jane@GMAIL.com \n")
+
+    assert padded.is_valid
+    assert results.validate("jane@gmail.com") is padded
+
+
+def test_entry_lives_as_long_as_the_mx_answer(clock, mx_answers):
+    mx_answers["gmail.com"] = (True, 300)
+    results = ResultCache(max_ttl=3600)
+
+    outcome = results.validate("jane@gmail.com")
+    assert outcome.max_age() == 300
+
+    clock.advance(299)
+    assert results.validate("jane@gmail.com") is outcome
+    clock.advance(1)
+    assert results.validate("jane@gmail.com") is not outcome
+    assert results.stats["expired"] == 1
+
+
+def test_entry_lifetime_is_capped(clock, mx_answers):
+    mx_answers["gmail.com"] = (True, 86400)
+    results = ResultCache(max_ttl=60)
+
+    assert results.validate("jane@gmail.com").max_age() == 60
+
+
+def test_new_disposable_list_drops_entries(clock, mx_answers, monkeypatch):
+    mx_answers["gmail.com"] = (True, 300)
+    results = ResultCache()
+    outcome = results.validate("jane@gmail.com")
+
+    monkeypatch.setattr(
+        domains, "disposable_domains_version", domains.disposable_domains_version + 1
+    )
+
+    assert results.validate("jane@gmail.com") is not outcome
+    assert results.stats["expired"] == 1
+
+
+def test_invalid_outcomes_are_cached(clock, mx_answers):
+    mx_answers["gmial.com"] = (False, 300)
+    results = ResultCache()
+
+    outcome = results.validate("jane@gmial.com")
+
+    assert not outcome.is_valid
+    assert outcome.error == "EmailMXRecordError"
+    assert outcome.suggestion == "jane@gmail.com"
+    assert results.validate("jane@gmial.com") is outcome
+
+
+def test_unavailable_lookup_is_not_cached(clock, mx_answers):
+    mx_answers["gmail.com"] = MXLookupUnavailableError("timed out")
+    results = ResultCache()
+
+    outcome = results.validate("jane@gmail.com")
+
+    assert outcome.error == "MXLookupUnavailableError"
+    assert outcome.max_age() == 0
+    assert results.get_stats()["size"] == 0
+
+
+def test_options_are_part_of_the_key(clock, mx_answers):
+    mx_answers["gmail.com"] = (True, 300)
+    results = ResultCache()
+
+    results.validate("jane@gmail.com")
+    results.validate("jane@gmail.com", check_deliverability=False)
+
+    assert results.get_stats()["size"] == 2